@@ -0,0 +1,87 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        '''Создаем автора, группу и посты в группе и без нее'''
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {number}',
+                group=cls.group if number % 2 else None
+            )
+            for number in range(5)
+        ]
+
+    def get_json(self, url, status=200, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def test_posts_are_paginated_by_cursor(self):
+        '''Лента отдается страницами, next_cursor ведет на следующую'''
+        url = reverse('api:posts')
+        first = self.get_json(url, limit=3)
+        second = self.get_json(url, limit=3, cursor=first['next_cursor'])
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+        self.assertIsNone(second['next_cursor'])
+        self.assertIsNotNone(second['previous_cursor'])
+
+    def test_fields_selection(self):
+        '''?fields= оставляет только перечисленные поля'''
+        data = self.get_json(reverse('api:posts'), fields='id,author,group')
+        self.assertEqual(data['results'][0], {
+            'id': self.posts[4].pk, 'author': 'author', 'group': None,
+        })
+        self.assertEqual(data['results'][1]['group'], 'group')
+        data = self.get_json(reverse('api:posts'), 400, fields='id,password')
+        self.assertIn('password', data['error'])
+
+    def test_group_and_profile_posts(self):
+        '''Ленты группы и автора содержат только их посты'''
+        data = self.get_json(
+            reverse('api:group_posts', args=(self.group.slug,)), fields='id'
+        )
+        self.assertEqual(
+            data['results'],
+            [{'id': self.posts[3].pk}, {'id': self.posts[1].pk}]
+        )
+        data = self.get_json(
+            reverse('api:profile_posts', args=(self.author.username,))
+        )
+        self.assertEqual(len(data['results']), 5)
+        data = self.get_json(
+            reverse('api:group_posts', args=('missing',)), 404
+        )
+        self.assertIn('error', data)
+
+    def test_export_streams_ndjson(self):
+        '''Выгрузка отдает сотруднику по посту на строку NDJSON'''
+        url = reverse('api:export_posts')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            url, {'fields': 'id,text', 'group': 'group'}
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [
+            json.loads(line) for line
+            in b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(rows, [
+            {'id': self.posts[1].pk, 'text': 'Пост 1'},
+            {'id': self.posts[3].pk, 'text': 'Пост 3'},
+        ])
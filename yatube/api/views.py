@@ -0,0 +1,140 @@
+"""JSON API постов только для чтения.
+
+Ленты отдаются страницами по курсору (posts.utils.CursorPaginator) —
+{"results": [...], "next_cursor": ..., "previous_cursor": ...}. Набор
+полей выбирается параметром ?fields=id,text,author. Выгрузка
+/api/posts/export/ отдает NDJSON потоком: строки values_list читаются
+итератором порциями по API_EXPORT_CHUNK_SIZE, поэтому память не зависит
+от числа постов.
+"""
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+
+from core.query_budget import query_budget
+from posts.models import Group, Post, User
+from posts.utils import CursorPaginator
+
+
+def file_url(name):
+    return default_storage.url(name) if name else None
+
+
+# Поле API: (как получить его из поста, путь для values_list выгрузки).
+FIELDS = {
+    'id': (lambda post: post.pk, 'pk'),
+    'text': (lambda post: post.text, 'text'),
+    'pub_date': (lambda post: post.pub_date, 'pub_date'),
+    'updated_at': (lambda post: post.updated_at, 'updated_at'),
+    'author': (lambda post: post.author.username, 'author__username'),
+    'group': (lambda post: post.group and post.group.slug, 'group__slug'),
+    'image': (lambda post: file_url(post.image.name), 'image'),
+    'thumbnail': (lambda post: post.thumbnail_url or None, 'thumbnail_url'),
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def get_fields(request):
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(FIELDS)
+    fields = fields.split(',')
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown:
+        raise BadRequest(f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.POSTS_LIMIT))
+    except ValueError:
+        raise BadRequest('limit должен быть числом')
+    return max(1, min(limit, settings.API_MAX_LIMIT))
+
+
+def error_response(error, status=400):
+    return JsonResponse({'error': str(error)}, status=status)
+
+
+def posts_page(request, posts):
+    try:
+        fields = get_fields(request)
+        limit = get_limit(request)
+    except BadRequest as error:
+        return error_response(error)
+    page_obj = CursorPaginator(
+        posts.select_related('author', 'group'), limit
+    ).page_by_cursor(request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [
+            {field: FIELDS[field][0](post) for field in fields}
+            for post in page_obj
+        ],
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@query_budget(4)
+def posts(request):
+    return posts_page(request, Post.objects.all())
+
+
+@query_budget(5)
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).first()
+    if group is None:
+        return error_response('Группа не найдена', 404)
+    return posts_page(request, Post.objects.filter(group=group))
+
+
+@query_budget(5)
+def profile_posts(request, username):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return error_response('Автор не найден', 404)
+    return posts_page(request, Post.objects.filter(author=author))
+
+
+def export_rows(posts, fields):
+    rows = posts.order_by('pk').values_list(
+        *(FIELDS[field][1] for field in fields)
+    ).iterator(chunk_size=settings.API_EXPORT_CHUNK_SIZE)
+    for values in rows:
+        row = dict(zip(fields, values))
+        if 'image' in row:
+            row['image'] = file_url(row['image'])
+        if 'thumbnail' in row:
+            row['thumbnail'] = row['thumbnail'] or None
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+        yield '\n'
+
+
+@query_budget(3)
+def export_posts(request):
+    """Все посты в NDJSON, по возрастанию id; ?group=, ?author= сужают
+    выгрузку. Доступно только сотрудникам.
+    """
+    if not request.user.is_staff:
+        return error_response('Выгрузка доступна только сотрудникам', 403)
+    try:
+        fields = get_fields(request)
+    except BadRequest as error:
+        return error_response(error)
+    posts = Post.objects.all()
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    response = StreamingHttpResponse(
+        export_rows(posts, fields), content_type='application/x-ndjson'
+    )
+    response['Content-Disposition'] = 'attachment; filename="posts.ndjson"'
+    return response
@@ -0,0 +1,46 @@
+"""SQLite для нескольких воркеров: WAL, PRAGMA при подключении и
+транзакции BEGIN IMMEDIATE.
+
+Стандартный бэкенд открывает базу в режиме журнала DELETE, где писатель
+блокирует читателей, а транзакция atomic() начинается с BEGIN DEFERRED:
+она берет блокировку записи только на первом INSERT/UPDATE, и если другой
+процесс уже пишет, SQLite сразу отвечает «database is locked», не
+дожидаясь busy_timeout. Здесь при каждом подключении выполняются PRAGMA из
+PRAGMAS (их можно дополнить в OPTIONS['pragmas']), а транзакции берут
+блокировку записи сразу и ждут ее до busy_timeout.
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db_backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            'CONN_MAX_AGE': 60,
+            'OPTIONS': {'pragmas': {'mmap_size': 0}},
+        }
+    }
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **params.pop('pragmas', {})}
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
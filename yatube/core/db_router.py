@@ -0,0 +1,85 @@
+"""Чтение с реплик, запись на основную базу.
+
+PrimaryReplicaRouter отправляет запись в default, а чтение — на случайную
+реплику из settings.DATABASE_REPLICAS (без реплик — тоже в default).
+Реплика может отставать, поэтому чтение закрепляется за основной базой:
+
+* до конца запроса или задачи — после первой записи в этом потоке;
+* на весь запрос — для POST и других небезопасных методов;
+* на REPLICA_PIN_SECONDS после записи — cookie, которую ставит
+  ReplicaPinningMiddleware, чтобы автор сразу увидел свой пост или
+  комментарий (read-your-writes);
+* на REPLICA_LAG_SECONDS после сброса кэша страницы или сдвига версии
+  ленты — для всех: первый читатель сохраняет результат в кэш под новым
+  ключом, и копия с отстающей реплики жила бы там до истечения.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_state = threading.local()
+
+
+def reset_pinning(pinned=False):
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def pin_if_changed_since(changed_at):
+    """Закрепляет чтение за основной базой, если с changed_at (timestamp
+    изменения кэшируемых данных) прошло меньше REPLICA_LAG_SECONDS.
+    """
+    if (changed_at is not None
+            and time.time() - changed_at < settings.REPLICA_LAG_SECONDS):
+        _state.pinned = True
+
+
+def has_written():
+    return getattr(_state, 'wrote', False)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if is_pinned() or not settings.DATABASE_REPLICAS:
+            return 'default'
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        _state.pinned = _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaPinningMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset_pinning(
+            request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES
+        )
+        # Время сброса страницы отмечает AnonymousPageCacheMiddleware.
+        pin_if_changed_since(getattr(request, 'page_changed_at', None))
+        try:
+            response = self.get_response(request)
+            wrote = has_written()
+        finally:
+            reset_pinning()
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True
+            )
+        return response
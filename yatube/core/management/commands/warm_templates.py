@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.template import TemplateSyntaxError
+
+from core.warmup import warm_up_templates
+
+
+class Command(BaseCommand):
+    help = 'Компилирует все шаблоны проекта и сообщает об ошибках в них'
+
+    def handle(self, *args, **options):
+        try:
+            names = warm_up_templates()
+        except TemplateSyntaxError as error:
+            raise CommandError(f'Ошибка в шаблоне: {error}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Скомпилировано шаблонов: {len(names)}')
+        )
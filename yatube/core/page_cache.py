@@ -0,0 +1,99 @@
+"""Кэш целых страниц для анонимных посетителей.
+
+AnonymousPageCacheMiddleware стоит в начале цепочки и отвечает из кэша
+раньше сессий, аутентификации, CSRF и рендеринга шаблона. Кэшируются
+только GET/HEAD-запросы без cookie сессии к представлениям, помеченным
+@cache_anonymous_page, и только ответы 200 без Set-Cookie. Ключ — путь,
+поколение пути и строка запроса, поэтому purge_pages(*paths) сбрасывает
+страницу пути сразу со всеми ее ?page= и ?cursor=.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+
+def cache_anonymous_page(view_func):
+    """Разрешает кэшировать страницу представления для анонимов."""
+    view_func.cache_anonymous_page = True
+    return view_func
+
+
+def _version_key(path):
+    return f'page-version:{path}'
+
+
+def get_page_version(path):
+    key = _version_key(path)
+    version = cache.get(key)
+    if version is None:
+        version = int(time.time() * 1000)
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def purge_pages(*paths):
+    """Сбрасывает кэш страниц по путям вместе со всеми строками запроса.
+    Пустые пути пропускаются.
+    """
+    cache.delete_many([_version_key(path) for path in set(paths) if path])
+
+
+def page_key(request):
+    """Ключ страницы. Поколение пути — время (в мс), когда его завели
+    после сброса, его запоминает request.page_changed_at: свежесброшенную
+    страницу рендерят с основной базы (core.db_router).
+    """
+    query = hashlib.md5(request.META.get('QUERY_STRING', '').encode())
+    version = get_page_version(request.path)
+    request.page_changed_at = version / 1000
+    return 'page:{}:{}:{}'.format(request.path, version, query.hexdigest())
+
+
+class AnonymousPageCacheMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.is_cacheable_request(request):
+            return self.get_response(request)
+        key = page_key(request)
+        response = cache.get(key)
+        if response is not None:
+            response['X-Page-Cache'] = 'hit'
+            return get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    response.get('Last-Modified', '')
+                ),
+                response=response,
+            )
+        response = self.get_response(request)
+        if self.is_cacheable_response(response):
+            cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+            response['X-Page-Cache'] = 'miss'
+        return response
+
+    def is_cacheable_request(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return getattr(match.func, 'cache_anonymous_page', False)
+
+    def is_cacheable_response(self, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+        )
@@ -0,0 +1,96 @@
+"""Учет SQL-запросов запроса и бюджеты запросов для представлений.
+
+QueryBudgetMiddleware через execute_wrapper всех подключений (основной
+базы и реплик) считает число и время SQL-запросов каждого HTTP-запроса —
+без DEBUG и debug_toolbar, так что работает и в продакшене. Представление
+объявляет свой бюджет декоратором @query_budget(n). Нарушением считается
+превышение бюджета или один и тот же запрос (с точностью до параметров),
+выполненный больше settings.QUERY_REPEAT_LIMIT раз, — признак N+1. При
+settings.QUERY_BUDGET_STRICT (при DEBUG и под тестами) нарушение —
+исключение, иначе — предупреждение в журнале.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(max_queries):
+    """Объявляет, сколько SQL-запросов может выполнить представление."""
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+class QueryRecorder:
+    """Обертка execute_wrapper: число, время и «формы» запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.monotonic() - started
+            self.count += 1
+            self.shapes[sql] += 1
+
+    def repeated(self):
+        return [
+            (sql, times) for sql, times in self.shapes.most_common()
+            if times > settings.QUERY_REPEAT_LIMIT
+        ]
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.query_budget = None
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(recorder)
+                )
+            response = self.get_response(request)
+        response['X-Query-Count'] = recorder.count
+        response['X-Query-Time'] = f'{recorder.duration * 1000:.1f}ms'
+        self.check(request, recorder)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, 'query_budget', None)
+
+    def check(self, request, recorder):
+        problems = []
+        budget = request.query_budget
+        if budget is not None and recorder.count > budget:
+            problems.append(
+                f'{recorder.count} SQL-запросов при бюджете {budget}'
+            )
+        problems.extend(
+            f'запрос выполнен {times} раз (N+1?): {sql}'
+            for sql, times in recorder.repeated()
+        )
+        if not problems:
+            return
+        message = f'{request.method} {request.path}: ' + '; '.join(problems)
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.cache_backends.sqlite import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        '''Два экземпляра бэкенда на одном файле — как два воркера'''
+        self.directory = tempfile.mkdtemp()
+        location = os.path.join(self.directory, 'cache.sqlite3')
+        params = {'KEY_PREFIX': 'test'}
+        self.cache = SQLiteCache(location, params)
+        self.other_worker_cache = SQLiteCache(location, params)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_are_shared_between_instances(self):
+        '''Запись одного экземпляра видна другому, удаление — тоже'''
+        self.cache.set('key', {'posts': [1, 2]})
+        self.assertEqual(
+            self.other_worker_cache.get('key'), {'posts': [1, 2]}
+        )
+        self.other_worker_cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_expired_values_are_missing(self):
+        '''Истекшая запись не возвращается и не мешает add()'''
+        self.cache.set('key', 'старое', 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertFalse(self.cache.has_key('key'))
+        self.assertTrue(self.other_worker_cache.add('key', 'новое'))
+
+    def test_add_succeeds_once(self):
+        '''Из одновременных add() одного ключа успешен ровно один'''
+        results = []
+        workers = [
+            threading.Thread(target=lambda cache=cache: results.append(
+                cache.add('lock', 1, 10)
+            ))
+            for cache in (self.cache, self.other_worker_cache) * 5
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(results.count(True), 1)
+
+    def test_incr_is_shared(self):
+        '''incr() видит изменения другого экземпляра'''
+        self.cache.set('version', 1)
+        self.other_worker_cache.incr('version')
+        self.assertEqual(self.cache.incr('version', 5), 7)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_key_prefix_and_version_separate_entries(self):
+        '''Разные версии ключа не пересекаются'''
+        self.cache.set('key', 'первая', version=1)
+        self.cache.set('key', 'вторая', version=2)
+        self.assertEqual(self.cache.get('key', version=1), 'первая')
+        self.assertEqual(self.cache.get('key', version=2), 'вторая')
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import threading
+
+from django.db import OperationalError, connections, transaction
+from django.test import SimpleTestCase
+
+WRITERS = 8
+WRITES = 25
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        connections.databases['stress'] = {
+            **connections['default'].settings_dict,
+            'NAME': os.path.join(self.directory.name, 'stress.sqlite3'),
+            'CONN_MAX_AGE': 0,
+            'TEST': {},
+        }
+        with connections['stress'].cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER)'
+            )
+            cursor.execute(
+                'CREATE TABLE item (writer INTEGER, number INTEGER)'
+            )
+            cursor.execute('INSERT INTO counter VALUES (1, 0)')
+
+    def tearDown(self):
+        connections['stress'].close()
+        del connections['stress']
+        del connections.databases['stress']
+        self.directory.cleanup()
+
+    def query(self, sql):
+        with connections['stress'].cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_on_connect(self):
+        '''При подключении включаются WAL и ожидание блокировки'''
+        self.assertEqual(self.query('PRAGMA journal_mode'), 'wal')
+        self.assertEqual(self.query('PRAGMA synchronous'), 1)
+        self.assertGreater(self.query('PRAGMA busy_timeout'), 0)
+
+    def test_concurrent_writers_do_not_hit_locked_database(self):
+        '''Параллельные транзакции «прочитать и записать» не падают с
+        database is locked и не теряют обновлений.
+        '''
+        errors = []
+
+        def write(writer):
+            try:
+                for number in range(WRITES):
+                    with transaction.atomic(using='stress'):
+                        with connections['stress'].cursor() as cursor:
+                            cursor.execute(
+                                'SELECT value FROM counter WHERE id = 1'
+                            )
+                            value = cursor.fetchone()[0]
+                            cursor.execute(
+                                'INSERT INTO item VALUES (%s, %s)',
+                                [writer, number]
+                            )
+                            cursor.execute(
+                                'UPDATE counter SET value = %s WHERE id = 1',
+                                [value + 1]
+                            )
+            except OperationalError as error:
+                errors.append(error)
+            finally:
+                connections['stress'].close()
+
+        threads = [
+            threading.Thread(target=write, args=(writer,))
+            for writer in range(WRITERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            self.query('SELECT COUNT(*) FROM item'), WRITERS * WRITES
+        )
+        self.assertEqual(
+            self.query('SELECT value FROM counter'), WRITERS * WRITES
+        )
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import tempfile
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.db_router import PIN_COOKIE
+from posts.models import Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TransactionTestCase):
+    '''Реплика — отдельный файл SQLite, который sync_replica() делает
+    копией основной базы; между синхронизациями она отстает.
+    '''
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        connections.databases['replica'] = {
+            **connections['default'].settings_dict,
+            'NAME': os.path.join(self.directory.name, 'replica.sqlite3'),
+            'TEST': {},
+        }
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Первый')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.sync_replica()
+
+    def tearDown(self):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+        self.directory.cleanup()
+
+    def sync_replica(self):
+        connections['replica'].close()
+        connections['default'].ensure_connection()
+        replica = sqlite3.connect(connections.databases['replica']['NAME'])
+        connections['default'].connection.backup(replica)
+        replica.close()
+
+    def index_posts(self, client):
+        response = client.get(reverse('posts:index'))
+        return [post.text for post in response.context['page_obj']]
+
+    @override_settings(REPLICA_LAG_SECONDS=0)
+    def test_reads_go_to_replica(self):
+        '''Чтение идет с реплики: ее отставание видно, пока она не
+        синхронизирована.
+        '''
+        Post.objects.create(author=self.author, text='Второй')
+        self.assertEqual(self.index_posts(Client()), ['Первый'])
+        self.sync_replica()
+        cache.clear()
+        self.assertEqual(self.index_posts(Client()), ['Второй', 'Первый'])
+
+    @override_settings(REPLICA_LAG_SECONDS=0)
+    def test_writer_reads_own_writes(self):
+        '''После записи автор читает из основной базы, остальные — с
+        реплики.
+        '''
+        response = self.author_client.post(
+            reverse('posts:add_comment', args=(self.post.id,)),
+            {'text': 'Свежий комментарий'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        url = reverse('posts:post_detail', args=(self.post.id,))
+        self.assertContains(self.author_client.get(url), 'Свежий комментарий')
+        self.assertNotContains(Client().get(url), 'Свежий комментарий')
+        self.assertNotIn(PIN_COOKIE, Client().get(url).cookies)
+
+    @override_settings(REPLICA_LAG_SECONDS=0)
+    def test_query_budget_counts_replica_queries(self):
+        '''Запросы к реплике входят в X-Query-Count и бюджеты'''
+        response = Client().get(reverse('posts:index'), {'page': 1})
+        self.assertEqual(response['X-Query-Count'], '2')
+
+    def test_fresh_cache_entries_are_rendered_from_primary(self):
+        '''Пока реплика может отставать после сброса кэша, страницы и
+        фрагменты лент рендерятся с основной базы, и в кэш не попадает
+        старая копия.
+        '''
+        reader_client = Client()
+        reader_client.force_login(User.objects.create_user(username='reader'))
+        self.sync_replica()
+        Post.objects.create(author=self.author, text='Второй')
+        url = reverse('posts:index')
+        for client in (Client(), reader_client):
+            self.assertContains(client.get(url), 'Второй')
+        with override_settings(REPLICA_LAG_SECONDS=0):
+            for client in (Client(), reader_client):
+                self.assertContains(client.get(url), 'Второй')
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.query_budget import (
+    QueryBudgetExceeded, QueryBudgetMiddleware, query_budget
+)
+
+User = get_user_model()
+
+
+def make_view(queries, repeat_same=False):
+    def view(request):
+        for number in range(queries):
+            if repeat_same:
+                User.objects.filter(pk=number).exists()
+            else:
+                User.objects.filter(pk=number)[number:number + 1].exists()
+        return HttpResponse()
+    return view
+
+
+@override_settings(QUERY_REPEAT_LIMIT=5)
+class QueryBudgetMiddlewareTests(TestCase):
+    def get(self, view):
+        '''Повторяет порядок Django: process_view вызывается внутри
+        обработки запроса, перед самим представлением.
+        '''
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+        middleware = QueryBudgetMiddleware(get_response)
+        return middleware(RequestFactory().get('/'))
+
+    def test_response_reports_query_count(self):
+        '''В ответ добавляется число SQL-запросов и их время'''
+        response = self.get(make_view(3))
+        self.assertEqual(response['X-Query-Count'], '3')
+        self.assertIn('X-Query-Time', response)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_budget_is_enforced_in_strict_mode(self):
+        '''Превышение бюджета под тестами — ошибка'''
+        self.get(query_budget(3)(make_view(3)))
+        with self.assertRaises(QueryBudgetExceeded):
+            self.get(query_budget(3)(make_view(4)))
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_repeated_query_is_reported_as_n_plus_one(self):
+        '''Один и тот же запрос больше QUERY_REPEAT_LIMIT раз — N+1'''
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'N+1'):
+            self.get(make_view(6, repeat_same=True))
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_violation_is_logged_outside_tests(self):
+        '''Вне тестов нарушение бюджета записывается в журнал'''
+        with self.assertLogs('core.query_budget', 'WARNING') as logs:
+            response = self.get(query_budget(1)(make_view(2)))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('бюджете 1', logs.output[0])
@@ -0,0 +1,41 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import engines
+from django.test import TestCase, override_settings
+
+from core.warmup import warm_up_templates
+
+CACHED_TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'DIRS': [settings.TEMPLATES_DIR],
+    'OPTIONS': {
+        'loaders': [('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ])],
+    },
+}]
+
+
+class TemplateWarmUpTests(TestCase):
+    def test_all_project_templates_compile(self):
+        '''Все шаблоны проекта компилируются без ошибок'''
+        names = warm_up_templates()
+        self.assertIn('posts/index.html', names)
+        self.assertIn('posts/includes/post_card.html', names)
+
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_warm_up_fills_cached_loader(self):
+        '''После прогрева кэширующий загрузчик уже хранит шаблоны'''
+        names = warm_up_templates()
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertTrue(set(names) <= set(loader.get_template_cache))
+
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_command_reports_compiled_templates(self):
+        '''Команда warm_templates сообщает число шаблонов'''
+        out = StringIO()
+        call_command('warm_templates', stdout=out)
+        self.assertIn('Скомпилировано шаблонов', out.getvalue())
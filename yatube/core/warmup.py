@@ -0,0 +1,30 @@
+"""Предварительная компиляция шаблонов.
+
+С кэширующим загрузчиком (production) шаблон разбирается при первом
+рендеринге в каждом процессе. warm_up_templates() загружает заранее все
+шаблоны из settings.TEMPLATES_DIR, чтобы первые запросы к воркеру не
+платили за чтение и разбор, а ошибки шаблонов всплывали при старте.
+"""
+import os
+
+from django.conf import settings
+from django.template import engines
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.endswith(TEMPLATE_EXTENSIONS):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def warm_up_templates():
+    """Компилирует все шаблоны проекта и возвращает их имена."""
+    engine = engines['django']
+    names = list(template_names(settings.TEMPLATES_DIR))
+    for name in names:
+        engine.get_template(name)
+    return names
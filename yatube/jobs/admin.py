@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'attempts', 'progress', 'run_after',
+        'created',
+    )
+    search_fields = ('name',)
+    list_filter = ('status', 'name',)
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Задачи сбрасывают кэш страниц и лент из процесса run_jobs; с кэшем
+    в памяти процесса веб-воркеры этого не видят.
+    """
+    if settings.CACHES['default']['BACKEND'] not in LOCAL_CACHES:
+        return []
+    return [Error(
+        'Кэш по умолчанию локален для процесса: фоновые задачи не смогут '
+        'сбросить страницы, закэшированные веб-воркерами.',
+        hint='Задайте YATUBE_CACHE_BACKEND: sqlite, file, redis или '
+             'memcached.',
+        id='jobs.E001',
+    )]
@@ -0,0 +1,101 @@
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import claim_jobs, execute, finish
+
+
+def init_worker():
+    """Процесс пула, запущенный через spawn, сам настраивает Django."""
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.JOBS_PROCESSES,
+            help='Размер пула процессов; 0 — выполнять в этом процессе',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=settings.JOBS_BATCH_SIZE,
+            help='Сколько задач забирать за раз',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и выйти',
+        )
+
+    def handle(self, *args, **options):
+        self.processes = options['processes']
+        self.executor = self.start_pool()
+        done = 0
+        try:
+            while True:
+                jobs = claim_jobs(options['batch'])
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                if self.executor is None:
+                    for job in jobs:
+                        finish(job, execute(job.name, job.args, job.pk))
+                else:
+                    self.run_in_pool(jobs)
+                done += len(jobs)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
+
+    def start_pool(self):
+        if not self.processes:
+            return None
+        return ProcessPoolExecutor(
+            max_workers=self.processes, initializer=init_worker
+        )
+
+    def run_in_pool(self, jobs):
+        """Выполняет задачи в пуле. Если процесс пула погиб (например,
+        убит по памяти), его задачи уходят на повтор, а пул пересоздается.
+        """
+        connections.close_all()
+        futures = {
+            self.executor.submit(execute, job.name, job.args, job.pk): job
+            for job in jobs
+        }
+        broken = False
+        for future in as_completed(futures):
+            try:
+                error = future.result()
+            except BrokenProcessPool:
+                broken = True
+                error = traceback.format_exc()
+            except Exception:
+                error = traceback.format_exc()
+            finish(futures[future], error)
+        if broken:
+            self.stderr.write('Пул процессов сломан, запускается новый')
+            self.executor.shutdown(wait=False)
+            self.executor = self.start_pool()
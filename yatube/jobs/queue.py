@@ -0,0 +1,130 @@
+"""Очередь фоновых задач в базе данных.
+
+Представление вызывает enqueue() и сразу отвечает, а задачу выполняет
+воркер `manage.py run_jobs`. Задача — строка в jobs_job: если создать ее
+в одной transaction.atomic() с данными, она не теряется и не выполняется
+раньше их фиксации. Внешний брокер не нужен, работает и на SQLite.
+
+Воркер забирает задачу на settings.JOBS_VISIBILITY_TIMEOUT секунд: если он
+упадет, не завершив ее, по истечении срока задачу заберет другой воркер.
+Упавшая задача повторяется с растущей задержкой до max_attempts раз.
+Долгая задача может сообщать о ходе выполнения через report_progress():
+он хранится в строке задачи и виден из любого процесса.
+"""
+import json
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+_current = threading.local()
+
+
+def job(func):
+    """Разрешает ставить функцию в очередь по ее пути импорта."""
+    func.is_job = True
+    func.job_name = f'{func.__module__}.{func.__qualname__}'
+    return func
+
+
+def enqueue(func, *args, max_attempts=None, delay=0):
+    """Ставит задачу в очередь; аргументы должны сериализоваться в JSON."""
+    if not getattr(func, 'is_job', False):
+        raise ValueError(f'{func!r} не отмечена декоратором @job')
+    return Job.objects.create(
+        name=func.job_name,
+        args=json.dumps(args),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def claim_jobs(limit, visibility_timeout=None):
+    """Забирает до limit готовых задач и возвращает их."""
+    now = timezone.now()
+    available = Q(status=Job.PENDING, run_after__lte=now) | Q(
+        status=Job.RUNNING, locked_until__lt=now
+    )
+    candidates = list(Job.objects.filter(available).order_by(
+        'run_after', 'pk'
+    ).values_list('pk', flat=True)[:limit])
+    if not candidates:
+        return []
+    token = uuid.uuid4().hex
+    timeout = visibility_timeout or settings.JOBS_VISIBILITY_TIMEOUT
+    Job.objects.filter(available, pk__in=candidates).update(
+        status=Job.RUNNING,
+        claimed_by=token,
+        locked_until=now + timedelta(seconds=timeout),
+        attempts=F('attempts') + 1,
+    )
+    return list(Job.objects.filter(
+        status=Job.RUNNING, claimed_by=token
+    ).order_by('run_after', 'pk'))
+
+
+def execute(name, args, job_id=None):
+    """Выполняет задачу; возвращает текст ошибки или None при успехе."""
+    _current.job_id = job_id
+    try:
+        func = import_string(name)
+        if not getattr(func, 'is_job', False):
+            raise ValueError(f'{name} не отмечена декоратором @job')
+        func(*json.loads(args))
+    except Exception:
+        return traceback.format_exc()
+    finally:
+        _current.job_id = None
+    return None
+
+
+def report_progress(progress):
+    """Сохраняет ход выполняемой задачи (JSON-сериализуемое значение);
+    вне задачи ничего не делает.
+    """
+    job_id = getattr(_current, 'job_id', None)
+    if job_id is not None:
+        Job.objects.filter(pk=job_id).update(progress=json.dumps(progress))
+
+
+def find_jobs(func, *args):
+    """Задачи func с аргументами args, сначала последние."""
+    return Job.objects.filter(
+        name=func.job_name, args=json.dumps(args)
+    ).order_by('-pk')
+
+
+def finish(job_obj, error):
+    """Записывает результат выполнения задачи, которую держит воркер."""
+    claimed = Job.objects.filter(
+        pk=job_obj.pk, status=Job.RUNNING, claimed_by=job_obj.claimed_by
+    )
+    if error is None:
+        claimed.update(status=Job.DONE, locked_until=None, last_error='')
+    elif job_obj.attempts >= job_obj.max_attempts:
+        claimed.update(
+            status=Job.FAILED, locked_until=None, last_error=error
+        )
+    else:
+        delay = settings.JOBS_RETRY_DELAY * 2 ** (job_obj.attempts - 1)
+        claimed.update(
+            status=Job.PENDING,
+            locked_until=None,
+            last_error=error,
+            run_after=timezone.now() + timedelta(seconds=delay),
+        )
+
+
+def run_pending(limit):
+    """Выполняет готовые задачи в текущем процессе; возвращает их число."""
+    jobs = claim_jobs(limit)
+    for job_obj in jobs:
+        finish(job_obj, execute(job_obj.name, job_obj.args, job_obj.pk))
+    return len(jobs)
@@ -0,0 +1,151 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.checks import check_shared_cache
+from jobs.models import Job
+from jobs.queue import (
+    claim_jobs, enqueue, job, report_progress, run_pending
+)
+from posts.models import User
+
+calls = []
+
+
+@job
+def record(value):
+    calls.append(value)
+
+
+@job
+def explode():
+    raise RuntimeError('задача упала')
+
+
+@job
+def half_done():
+    report_progress({'done': 50})
+
+
+def not_a_job():
+    pass
+
+
+@override_settings(JOBS_RETRY_DELAY=60, JOBS_MAX_ATTEMPTS=2)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueued_job_runs_once(self):
+        '''Задача из очереди выполняется один раз и отмечается выполненной'''
+        queued = enqueue(record, 'значение')
+        self.assertEqual(run_pending(10), 1)
+        self.assertEqual(run_pending(10), 0)
+        self.assertEqual(calls, ['значение'])
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.DONE)
+
+    def test_progress_is_stored_on_job_row(self):
+        '''Ход выполнения задачи сохраняется в ее строке'''
+        queued = enqueue(half_done)
+        run_pending(10)
+        queued.refresh_from_db()
+        self.assertEqual(queued.progress, '{"done": 50}')
+
+    def test_only_marked_functions_can_be_enqueued(self):
+        '''В очередь ставятся только функции с декоратором @job'''
+        with self.assertRaises(ValueError):
+            enqueue(not_a_job)
+
+    def test_failed_job_is_retried_later_then_fails(self):
+        '''Упавшая задача откладывается, а после max_attempts — проваливается
+        '''
+        queued = enqueue(explode)
+        run_pending(10)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.PENDING)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('задача упала', queued.last_error)
+        self.assertGreater(queued.run_after, timezone.now())
+        Job.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+        run_pending(10)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.FAILED)
+        self.assertEqual(queued.attempts, 2)
+
+    def test_stuck_job_is_reclaimed_after_visibility_timeout(self):
+        '''Задачу упавшего воркера забирают после истечения блокировки'''
+        queued = enqueue(record, 'повтор')
+        self.assertEqual(len(claim_jobs(10)), 1)
+        self.assertEqual(claim_jobs(10), [])
+        Job.objects.filter(pk=queued.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(run_pending(10), 1)
+        self.assertEqual(calls, ['повтор'])
+
+    def test_run_jobs_command_processes_queue(self):
+        '''Команда run_jobs --once выполняет задачи и завершается'''
+        enqueue(record, 1)
+        enqueue(record, 2)
+        call_command(
+            'run_jobs', processes=0, once=True, stdout=StringIO()
+        )
+        self.assertEqual(calls, [1, 2])
+
+    def test_run_jobs_survives_broken_pool(self):
+        '''Гибель процесса пула не роняет run_jobs: задача уходит на
+        повтор, а пул пересоздается
+        '''
+        def submit(*args):
+            future = Future()
+            future.set_exception(BrokenProcessPool('процесс убит'))
+            return future
+
+        queued = enqueue(record, 1)
+        with mock.patch(
+            'jobs.management.commands.run_jobs.ProcessPoolExecutor'
+        ) as pool:
+            pool.return_value.submit.side_effect = submit
+            call_command(
+                'run_jobs', processes=2, once=True,
+                stdout=StringIO(), stderr=StringIO(),
+            )
+        self.assertEqual(pool.call_count, 2)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.PENDING)
+        self.assertIn('BrokenProcessPool', queued.last_error)
+
+    def test_password_reset_email_is_sent_by_worker(self):
+        '''Письмо сброса пароля отправляет воркер, а не запрос'''
+        User.objects.create_user(
+            username='user', email='user@example.com', password='pass'
+        )
+        self.client.post(
+            '/auth/password_reset/', {'email': 'user@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        run_pending(10)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+
+    def test_deploy_check_requires_shared_cache(self):
+        '''Проверка --deploy не пропускает кэш в памяти процесса'''
+        locmem = 'django.core.cache.backends.locmem.LocMemCache'
+        filebased = 'django.core.cache.backends.filebased.FileBasedCache'
+        with override_settings(CACHES={'default': {'BACKEND': locmem}}):
+            self.assertEqual(
+                [error.id for error in check_shared_cache(None)],
+                ['jobs.E001'],
+            )
+        with override_settings(CACHES={'default': {
+            'BACKEND': filebased, 'LOCATION': '/tmp/yatube-check',
+        }}):
+            self.assertEqual(check_shared_cache(None), [])
@@ -1,6 +1,11 @@
-from django.contrib import admin
+from collections import Counter
 
-from .models import Comment, Follow, Group, Post
+from django.contrib import admin, messages
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from .deletion import schedule_user_deletion
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .search import search_posts
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,6 +15,11 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
     list_editable = ('group',)
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_posts(queryset, search_term), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'description',)
@@ -29,7 +39,95 @@ class FollowAdmin(admin.ModelAdmin):
     list_filter = ('user', 'author',)
 
 
+class UserAdmin(BaseUserAdmin):
+    """Удаляет пользователей пачками через schedule_user_deletion():
+    каскад Django загрузил бы в память все их записи.
+    """
+    stat_fields = (
+        (Post, ('post_count',)),
+        (Comment, ('comment_count',)),
+        (Follow, ('follower_count', 'following_count')),
+    )
+
+    def get_deleted_objects(self, objs, request):
+        """Сводка по UserStats вместо обхода всех связанных объектов.
+
+        Как и в Django, удалить пользователей можно, только если есть
+        права на удаление всех их записей.
+        """
+        stats = {
+            row.user_id: row
+            for row in UserStats.objects.filter(user__in=objs)
+        }
+        to_delete = []
+        related = Counter()
+        for user in objs:
+            row = stats.get(user.pk)
+            counts = {
+                model: sum(getattr(row, field) for field in fields)
+                if row else 0
+                for model, fields in self.stat_fields
+            }
+            related.update(counts)
+            to_delete.append(f'{user}: ' + ', '.join(
+                f'{model._meta.verbose_name_plural} — {count}'
+                for model, count in counts.items()
+            ))
+        model_count = {User._meta.verbose_name_plural: len(objs)}
+        model_count.update(
+            (model._meta.verbose_name_plural, count)
+            for model, count in related.items()
+        )
+        perms_needed = {
+            model._meta.verbose_name for model, count in related.items()
+            if count and not self.can_delete(request, model)
+        }
+        return to_delete, model_count, perms_needed, []
+
+    def can_delete(self, request, model):
+        model_admin = self.admin_site._registry.get(model)
+        return model_admin is None or model_admin.has_delete_permission(
+            request
+        )
+
+    def message_user(self, request, message, level=messages.INFO,
+                     *args, **kwargs):
+        # Об удалении сообщает report_deletion(): стандартное «успешно
+        # удален» неверно, если удаление только поставлено в очередь.
+        if level == messages.SUCCESS and getattr(
+            request, 'user_deletion_reported', False
+        ):
+            return
+        super().message_user(request, message, level, *args, **kwargs)
+
+    def report_deletion(self, request, users):
+        deleted, queued = [], []
+        for user in users:
+            (queued if schedule_user_deletion(user) else deleted).append(
+                str(user)
+            )
+        if deleted:
+            self.message_user(
+                request, f'Удалены: {", ".join(deleted)}', messages.SUCCESS
+            )
+        if queued:
+            self.message_user(
+                request,
+                f'Удаление поставлено в очередь: {", ".join(queued)}',
+                messages.WARNING,
+            )
+        request.user_deletion_reported = True
+
+    def delete_model(self, request, obj):
+        self.report_deletion(request, [obj])
+
+    def delete_queryset(self, request, queryset):
+        self.report_deletion(request, queryset)
+
+
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
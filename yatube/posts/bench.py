@@ -0,0 +1,182 @@
+"""Замеры представлений posts на большом наборе данных.
+
+run_benchmarks() прогоняет представления через тестовый клиент от имени
+самого активного читателя (анонимов отдал бы кэш целых страниц) и для
+каждого сценария пишет перцентили задержки, число SQL-запросов и пик
+памяти на запрос. Ленты меряются на разной глубине: номерной страницей
+?page=N и курсором на ту же позицию. Результаты с одинаковыми view, mode
+и depth сравнимы между коммитами, см. compare_reports().
+"""
+import time
+import tracemalloc
+
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, RequestFactory
+from django.urls import reverse
+
+from .feed import get_follow_feed
+from .models import Group, Post, User
+from .utils import FEED_KEY, get_paginator_func
+
+FEED_VIEWS = ('index', 'group_posts', 'profile', 'follow_index')
+VIEWS = FEED_VIEWS + ('post_detail', 'add_comment', 'post_create')
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    values = sorted(values)
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[rank - 1]
+
+
+def pick_targets():
+    """Самые нагруженные объекты набора: на них видна цена глубины."""
+    reader = User.objects.annotate(
+        follows=Count('follower')
+    ).order_by('-follows', 'pk').first()
+    return {
+        'reader': reader,
+        'group': Group.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total', 'pk').first(),
+        'author': User.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total', 'pk').first(),
+        'post': Post.objects.annotate(
+            total=Count('comments')
+        ).order_by('-total', 'pk').first(),
+    }
+
+
+def feed_for(view, targets):
+    """Путь ленты, ее посты и ключ сортировки, как в представлении."""
+    if view == 'index':
+        return reverse('posts:index'), Post.objects.all(), FEED_KEY
+    if view == 'group_posts':
+        group = targets['group']
+        return (
+            reverse('posts:group_list', args=(group.slug,)),
+            group.posts.all(), FEED_KEY
+        )
+    if view == 'profile':
+        author = targets['author']
+        return (
+            reverse('posts:profile', args=(author.username,)),
+            author.posts.all(), FEED_KEY
+        )
+    posts, key = get_follow_feed(targets['reader'])
+    return reverse('posts:follow_index'), posts, key
+
+
+def cursor_at(posts, key, depth):
+    """Курсор, ведущий на страницу depth, или None, если ее нет."""
+    request = RequestFactory().get('/', {'page': depth - 1})
+    page_obj = get_paginator_func(request, posts, key)
+    if page_obj.number != depth - 1:
+        return None
+    return getattr(page_obj, 'next_cursor', None)
+
+
+def measure(send, repeat):
+    """Прогревает запрос, затем снимает запросы к базе, память и время."""
+    send()
+    queries = []
+
+    def count_query(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_query):
+        response = send()
+    tracemalloc.start()
+    send()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        send()
+        timings.append((time.perf_counter() - started) * 1000)
+    latency = {f'p{percent}': round(percentile(timings, percent), 3)
+               for percent in PERCENTILES}
+    latency.update(
+        mean=round(sum(timings) / len(timings), 3),
+        min=round(min(timings), 3),
+        max=round(max(timings), 3),
+    )
+    return {
+        'status': response.status_code,
+        'queries': len(queries),
+        'latency_ms': latency,
+        'peak_memory_kib': round(peak / 1024, 1),
+    }
+
+
+def scenarios(targets, depths, views=VIEWS):
+    """Сценарии замеров: (view, mode, depth, method, path, data)."""
+    for view in views:
+        if view == 'group_posts' and targets['group'] is None:
+            continue
+        if view in FEED_VIEWS:
+            path, posts, key = feed_for(view, targets)
+            for depth in depths:
+                yield view, 'page', depth, 'get', path, {'page': depth}
+                cursor = depth > 1 and cursor_at(posts, key, depth)
+                if cursor:
+                    yield view, 'cursor', depth, 'get', path, {
+                        'cursor': cursor
+                    }
+        elif view == 'post_detail':
+            yield view, 'page', 1, 'get', reverse(
+                'posts:post_detail', args=(targets['post'].pk,)
+            ), {}
+        elif view == 'add_comment':
+            yield view, 'post', 1, 'post', reverse(
+                'posts:add_comment', args=(targets['post'].pk,)
+            ), {'text': 'Комментарий из замера'}
+        elif view == 'post_create':
+            yield view, 'post', 1, 'post', reverse('posts:post_create'), {
+                'text': 'Пост из замера',
+                'group': targets['group'].pk if targets['group'] else '',
+            }
+
+
+def run_benchmarks(repeat=30, depths=(1, 10, 100), views=VIEWS):
+    """Замеры по текущей базе; возвращает список результатов."""
+    targets = pick_targets()
+    client = Client()
+    client.force_login(targets['reader'])
+    results = []
+    for view, mode, depth, method, path, data in list(
+        scenarios(targets, depths, views)
+    ):
+        send = getattr(client, method)
+        result = {'view': view, 'mode': mode, 'depth': depth, 'path': path}
+        result.update(measure(lambda: send(path, data), repeat))
+        results.append(result)
+    return results
+
+
+def result_key(result):
+    return result['view'], result['mode'], result['depth']
+
+
+def compare_reports(old, new):
+    """Изменение медианы и числа запросов относительно старого отчета.
+
+    Возвращает строки (view, mode, depth, p50 было, p50 стало, запросов
+    было, запросов стало) для сценариев, которые есть в обоих отчетах.
+    """
+    old_results = {result_key(result): result for result in old['results']}
+    rows = []
+    for result in new['results']:
+        before = old_results.get(result_key(result))
+        if before is None:
+            continue
+        rows.append(result_key(result) + (
+            before['latency_ms']['p50'], result['latency_ms']['p50'],
+            before['queries'], result['queries'],
+        ))
+    return rows
@@ -0,0 +1,228 @@
+"""Версии кэшированных фрагментов лент.
+
+Каждая лента (главная, группа, профиль) имеет счетчик-поколение в кэше.
+Шаблон добавляет его к ключу {% cache %}, а сигналы увеличивают счетчик
+при изменении постов, поэтому фрагменты живут долго, но не устаревают:
+после изменения просто перестает совпадать ключ.
+
+Начальное значение счетчика берется из текущего времени: если ключ версии
+вытеснят из кэша, новое поколение не совпадет ни с одним старым.
+"""
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import NoReverseMatch, reverse
+
+from core.page_cache import purge_pages
+
+from .models import Group, Post, User
+
+INDEX_FEED = 'index'
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def profile_feed(author_id):
+    return f'profile:{author_id}'
+
+
+def _version_key(feed):
+    return f'feed-version:{feed}'
+
+
+def _initial_version():
+    return int(time.time() * 1000)
+
+
+def get_feed_version(feed):
+    """Текущее поколение ленты."""
+    key = _version_key(feed)
+    version = cache.get(key)
+    if version is None:
+        version = _initial_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bumped_key(feed):
+    return f'feed-bumped:{feed}'
+
+
+def get_feed_bumped_at(*feeds):
+    """Время (timestamp) последнего сдвига поколения любой из лент.
+
+    Если отметки нет в кэше (вытеснена или ленту еще не сдвигали), ею
+    становится текущее время: лучше лишний раз отдать страницу целиком,
+    чем ответить 304 на измененную.
+    """
+    stamps = cache.get_many([_bumped_key(feed) for feed in feeds])
+    now = time.time()
+    for feed in feeds:
+        key = _bumped_key(feed)
+        if key not in stamps:
+            cache.add(key, now, None)
+            stamps[key] = cache.get(key, now)
+    return max(stamps.values())
+
+
+def bump_feed_versions(*feeds):
+    """Сдвигает поколения лент, делая их фрагменты недействительными, и
+    запоминает время сдвига.
+    """
+    for feed in feeds:
+        key = _version_key(feed)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+    now = time.time()
+    cache.set_many({_bumped_key(feed): now for feed in feeds}, None)
+
+
+def bump_post_feeds(author_id, *group_ids):
+    """Инвалидирует все ленты, в которых виден пост автора."""
+    bump_feed_versions(
+        INDEX_FEED,
+        profile_feed(author_id),
+        *(group_feed(group_id) for group_id in group_ids if group_id),
+    )
+
+
+def page_path(name, *args):
+    """Путь страницы или None, если у объекта нет страницы (например,
+    слаг группы не подходит под шаблон адреса).
+    """
+    try:
+        return reverse(name, args=args)
+    except NoReverseMatch:
+        return None
+
+
+def purge_post_pages(post, *group_ids):
+    """Сбрасывает кэш анонимных страниц, на которых виден пост.
+
+    Страницы остальных постов автора (на них число его постов) не
+    перебираются — это O(постов автора) на каждую запись; они обновятся
+    через PAGE_CACHE_TIMEOUT, как и после массовых операций.
+    """
+    paths = [
+        page_path('posts:index'),
+        page_path('posts:profile', post.author.username),
+        page_path('posts:post_detail', post.pk),
+    ]
+    slugs = Group.objects.filter(
+        pk__in=[group_id for group_id in group_ids if group_id]
+    ).values_list('slug', flat=True)
+    paths.extend(page_path('posts:group_list', slug) for slug in slugs)
+    purge_pages(*paths)
+
+
+def purge_feeds(author_ids, group_ids):
+    """bump_post_feeds и сброс страниц лент сразу для многих авторов и
+    групп — для массовых операций, которые проходят мимо сигналов.
+
+    Страницы отдельных постов авторов (на них число постов автора) не
+    сбрасываются: их может быть слишком много, поэтому они обновятся через
+    PAGE_CACHE_TIMEOUT.
+    """
+    bump_feed_versions(
+        INDEX_FEED,
+        *(profile_feed(author_id) for author_id in author_ids),
+        *(group_feed(group_id) for group_id in group_ids),
+    )
+    usernames = User.objects.filter(
+        pk__in=author_ids
+    ).values_list('username', flat=True)
+    slugs = Group.objects.filter(
+        pk__in=group_ids
+    ).values_list('slug', flat=True)
+    purge_pages(
+        page_path('posts:index'),
+        *(page_path('posts:profile', username) for username in usernames),
+        *(page_path('posts:group_list', slug) for slug in slugs),
+    )
+
+
+def purge_group_pages(group, *slugs):
+    """Сбрасывает кэш страниц, где выводится название группы; slugs —
+    прежние адреса группы.
+    """
+    posts = Post.objects.filter(group_id=group.pk).values_list(
+        'pk', 'author__username'
+    )
+    paths = [
+        page_path('posts:index'),
+        *(page_path('posts:group_list', slug)
+          for slug in {group.slug, *slugs} if slug),
+    ]
+    for post_id, username in posts:
+        paths.append(page_path('posts:post_detail', post_id))
+        paths.append(page_path('posts:profile', username))
+    purge_pages(*paths)
+
+
+def get_or_compute(key, compute, timeout, cache_backend=cache,
+                   delta_key=None):
+    """Значение из кэша с защитой от «стаи» одновременных пересчетов.
+
+    Запись хранится еще FEED_CACHE_STALE_GRACE секунд после истечения
+    timeout. Устаревшее значение пересчитывает только один процесс —
+    тот, кто взял блокировку через add(), — остальные в это время
+    получают старое значение. Незадолго до истечения запись с небольшой
+    вероятностью пересчитывается заранее (XFetch), пропорционально тому,
+    сколько длился прошлый пересчет, чтобы истечения не совпадали.
+
+    Старого значения нет у нового ключа (например, после смены версии
+    ленты): тогда остальные ждут чужой пересчет не дольше двух его обычных
+    длительностей — их хранит delta_key, общий для всех версий фрагмента, —
+    а затем считают сами.
+    """
+    entry = cache_backend.get(key)
+    if entry is not None:
+        value, expires_at, delta = entry
+        early = delta * settings.FEED_CACHE_EARLY_BETA * math.log(
+            1 - random.random()
+        )
+        if time.time() - early < expires_at:
+            return value
+    lock_key = f'{key}:lock'
+    if cache_backend.add(lock_key, 1, settings.FEED_CACHE_LOCK_TIMEOUT):
+        try:
+            return _compute_and_store(
+                key, compute, timeout, cache_backend, delta_key
+            )
+        finally:
+            cache_backend.delete(lock_key)
+    if entry is not None:
+        return entry[0]
+    wait = settings.FEED_CACHE_LOCK_TIMEOUT
+    delta = cache_backend.get(delta_key) if delta_key else None
+    if delta is not None:
+        wait = min(wait, 2 * delta)
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        time.sleep(min(0.05, wait))
+        entry = cache_backend.get(key)
+        if entry is not None:
+            return entry[0]
+    return compute()
+
+
+def _compute_and_store(key, compute, timeout, cache_backend, delta_key):
+    started = time.time()
+    value = compute()
+    finished = time.time()
+    cache_backend.set(
+        key,
+        (value, finished + timeout, finished - started),
+        timeout + settings.FEED_CACHE_STALE_GRACE,
+    )
+    if delta_key:
+        cache_backend.set(delta_key, finished - started, None)
+    return value
@@ -0,0 +1,83 @@
+"""Пакетный рендеринг карточек постов.
+
+Раньше лента в цикле делала {% include 'posts/includes/post_card.html' %}
+с тремя {% url %} на каждую карточку. render_cards() рендерит всю страницу
+карточек за один проход: адреса считаются заранее (профили и группы — по
+одному разу на автора и группу), а HTML каждой карточки берется из кэша
+одним get_many(); шаблону остается только вывести готовые строки. Ключ
+карточки — «версия» поста: все, что выводится в карточке, включая
+updated_at, имя автора и название группы, поэтому правки не требуют
+отдельной инвалидации.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import Context
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_key(post, flags):
+    group = post.group
+    version = (
+        post.pk, post.updated_at, post.author.username,
+        post.author.get_full_name(),
+        group and (group.pk, group.slug, group.title), flags,
+    )
+    digest = hashlib.md5(repr(version).encode()).hexdigest()
+    return f'post-card:{post.pk}:{digest}'
+
+
+class CardURLs:
+    """Адреса для карточек с запоминанием профилей и групп."""
+
+    def __init__(self):
+        self.profiles = {}
+        self.groups = {}
+
+    def profile(self, author):
+        if author.username not in self.profiles:
+            self.profiles[author.username] = reverse(
+                'posts:profile', args=(author.username,)
+            )
+        return self.profiles[author.username]
+
+    def group(self, group):
+        if group is None:
+            return None
+        if group.slug not in self.groups:
+            self.groups[group.slug] = reverse(
+                'posts:group_list', args=(group.slug,)
+            )
+        return self.groups[group.slug]
+
+
+def render_cards(posts, profile_flag=False, group_list_flag=False,
+                 cache_backend=cache):
+    """HTML карточек постов в порядке posts."""
+    posts = list(posts)
+    flags = {'profile_flag': profile_flag, 'group_list_flag': group_list_flag}
+    keys = [card_key(post, (profile_flag, group_list_flag)) for post in posts]
+    cards = cache_backend.get_many(keys)
+    missing = {}
+    if len(cards) < len(keys):
+        template = get_template(CARD_TEMPLATE).template
+        context = Context(flags)
+        urls = CardURLs()
+        for post, key in zip(posts, keys):
+            if key in cards:
+                continue
+            with context.push(
+                post=post,
+                profile_url=urls.profile(post.author),
+                detail_url=reverse('posts:post_detail', args=(post.pk,)),
+                group_url=urls.group(post.group),
+            ):
+                missing[key] = template.render(context)
+        cache_backend.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,114 @@
+"""Условные GET-запросы (ETag / Last-Modified) для лент и страницы поста.
+
+Валидаторы лент берутся из кэша, без запросов к таблице постов: поколения
+лент из posts.cache сдвигают сигналы при любом изменении видимых в ленте
+постов, авторов и групп, а время последнего сдвига служит Last-Modified —
+в отличие от даты правки постов, оно меняется и при удалении поста или
+переименовании группы. Страница поста дополнительно учитывает изменения
+поста и его комментариев. К ETag подмешиваются пользователь — страница
+отличается для разных посетителей — и его CSRF-секрет: формы страницы
+содержат токен, и после смены секрета (например, при новом входе) старая
+копия страницы уже не годится. Совпавший If-None-Match или
+If-Modified-Since дает 304 Not Modified без рендеринга страницы.
+"""
+import hashlib
+from datetime import datetime
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from core.db_router import pin_if_changed_since
+
+from .cache import (
+    INDEX_FEED, get_feed_bumped_at, get_feed_version, group_feed,
+    profile_feed
+)
+from .models import Group, Post, User
+from .stats import get_user_stats, with_profile_stats
+
+
+def conditional_page(get_validators):
+    """Как django.views.decorators.http.condition, но ETag и Last-Modified
+    берутся из одного вызова get_validators(request, *args, **kwargs),
+    который возвращает пару (части ETag, last_modified).
+    """
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, '_validators'):
+            parts, last_modified = get_validators(request, *args, **kwargs)
+            parts = (
+                *parts, request.user.pk, request.META.get('CSRF_COOKIE')
+            )
+            etag = hashlib.md5(
+                '-'.join(str(part) for part in parts).encode()
+            ).hexdigest()
+            request._validators = etag, last_modified
+        return request._validators
+
+    return condition(
+        etag_func=lambda *args, **kwargs: validators(*args, **kwargs)[0],
+        last_modified_func=(
+            lambda *args, **kwargs: validators(*args, **kwargs)[1]
+        ),
+    )
+
+
+def feed_validators(*feeds):
+    """Валидаторы лент: их поколения и время последнего сдвига."""
+    parts = tuple(get_feed_version(feed) for feed in feeds)
+    bumped_at = get_feed_bumped_at(*feeds)
+    # Фрагмент ленты кэшируется под новой версией: пока реплика может
+    # отставать, его рендерят с основной базы.
+    pin_if_changed_since(bumped_at)
+    return parts, datetime.fromtimestamp(bumped_at, timezone.utc)
+
+
+def index_validators(request):
+    return feed_validators(INDEX_FEED)
+
+
+def group_validators(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return (None,), None
+    return feed_validators(group_feed(group_id))
+
+
+def profile_validators(request, username):
+    # Профиль выводит счетчики подписок и кнопку подписки посетителя, а
+    # они меняются без правки постов. Автор со счетчиками читается одним
+    # запросом и остается на запросе для самой view.
+    author = with_profile_stats(
+        User.objects.filter(username=username), request.user
+    ).first()
+    request._profile_author = author
+    if author is None:
+        return (None,), None
+    stats = get_user_stats(author)
+    parts, last_modified = feed_validators(profile_feed(author.pk))
+    return (
+        *parts, stats.follower_count, stats.following_count,
+        author.is_following
+    ), last_modified
+
+
+def post_validators(request, post_id):
+    state = next(iter(Post.objects.filter(pk=post_id).values(
+        'author_id', 'updated_at'
+    ).annotate(
+        comment_count=Count('comments'),
+        comments_modified=Max('comments__updated_at'),
+    ).order_by()[:1]), None)
+    if state is None:
+        return (None,), None
+    last_modified = max(filter(None, (
+        state['updated_at'], state['comments_modified']
+    )))
+    parts = (
+        state['updated_at'], state['comment_count'],
+        state['comments_modified'],
+        get_feed_version(profile_feed(state['author_id'])),
+    )
+    return parts, last_modified
@@ -0,0 +1,245 @@
+"""Пакетное удаление постов и пользователей.
+
+Каскад Django сначала загружает в память все зависимые объекты, а затем
+удаляет их с сигналами по одному — для автора с сотнями тысяч записей это
+долго и держит одну огромную транзакцию. Здесь строки удаляются прямыми
+DELETE по settings.DELETION_BATCH_SIZE штук, каждая пачка — в своей
+транзакции: сначала комментарии, затем посты с записями лент и поискового
+индекса, затем подписки. Сигналы при этом не срабатывают, поэтому счетчики
+UserStats, версии лент и кэш страниц обновляются здесь же раз на пачку.
+
+Удаление можно прервать и запустить снова: каждая пачка выбирается заново
+из оставшихся строк. Пользователя с большим числом записей удаляет фоновая
+задача; ход удаления она пишет в свою строку очереди, откуда его читает
+get_deletion_progress() в любом процессе.
+"""
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.db import router, transaction
+
+from core.page_cache import purge_pages
+from jobs.queue import enqueue, find_jobs, job, report_progress
+
+from . import feed, search
+from .cache import (
+    bump_feed_versions, page_path, profile_feed, purge_feeds
+)
+from .models import Comment, FeedItem, Follow, Post, User, UserStats
+from .stats import change_stats_many, reconcile_stats
+
+
+def raw_delete(model, **filters):
+    """DELETE без каскада, сигналов и предварительного SELECT."""
+    return model.objects.filter(**filters)._raw_delete(
+        router.db_for_write(model)
+    )
+
+
+def batches(queryset, fields, batch_size):
+    """Первые batch_size строк queryset, пока они есть; читаются с
+    основной базы, поэтому удаленное не возвращается с отстающей реплики.
+    """
+    queryset = queryset.using(router.db_for_write(queryset.model))
+    while True:
+        rows = list(queryset.order_by('pk').values_list(*fields)[:batch_size])
+        if not rows:
+            return
+        yield rows
+
+
+def negative_counts(user_ids):
+    return {user_id: -count for user_id, count in Counter(user_ids).items()}
+
+
+def delete_in_batches(queryset, batch_size=None):
+    """Удаляет строки queryset пачками; возвращает их число."""
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    deleted = 0
+    for rows in batches(queryset, ('pk',), batch_size):
+        deleted += raw_delete(queryset.model, pk__in=[pk for pk, in rows])
+    return deleted
+
+
+def delete_comments(comments, batch_size=None):
+    """Удаляет комментарии queryset comments; возвращает их число."""
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    deleted = 0
+    for rows in batches(comments, ('pk', 'author_id', 'post_id'), batch_size):
+        comment_ids, author_ids, post_ids = zip(*rows)
+        with transaction.atomic():
+            deleted += raw_delete(Comment, pk__in=comment_ids)
+            change_stats_many('comment_count', negative_counts(author_ids))
+        purge_pages(*(
+            page_path('posts:post_detail', post_id)
+            for post_id in set(post_ids)
+        ))
+    return deleted
+
+
+def delete_posts(posts, batch_size=None, progress=None):
+    """Удаляет посты queryset posts вместе с комментариями к ним.
+
+    Возвращает Counter удаленных постов и комментариев; progress(stage,
+    deleted) вызывается после каждой пачки постов.
+    """
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    deleted = Counter()
+    for rows in batches(posts, ('pk', 'author_id', 'group_id'), batch_size):
+        post_ids, author_ids, group_ids = zip(*rows)
+        deleted['comments'] += delete_comments(
+            Comment.objects.filter(post_id__in=post_ids), batch_size
+        )
+        with transaction.atomic():
+            delete_in_batches(
+                FeedItem.objects.filter(post_id__in=post_ids), batch_size
+            )
+            search.unindex_posts(post_ids)
+            deleted['posts'] += raw_delete(Post, pk__in=post_ids)
+            change_stats_many('post_count', negative_counts(author_ids))
+        purge_feeds(
+            set(author_ids), {group_id for group_id in group_ids if group_id}
+        )
+        purge_pages(*(
+            page_path('posts:post_detail', post_id) for post_id in post_ids
+        ))
+        if progress is not None:
+            progress('posts', deleted)
+    return deleted
+
+
+def delete_follows(user_id, batch_size=None):
+    """Удаляет подписки пользователя и на пользователя; возвращает их
+    число. Счетчики второй стороны уменьшаются, ее профиль сбрасывается.
+    """
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    deleted = 0
+    for field, counter, other_field in (
+        ('user_id', 'follower_count', 'author_id'),
+        ('author_id', 'following_count', 'user_id'),
+    ):
+        follows = Follow.objects.filter(**{field: user_id})
+        for rows in batches(follows, ('pk', other_field), batch_size):
+            follow_ids, other_ids = zip(*rows)
+            with transaction.atomic():
+                deleted += raw_delete(Follow, pk__in=follow_ids)
+                change_stats_many(counter, negative_counts(other_ids))
+            bump_feed_versions(*(
+                profile_feed(other_id) for other_id in set(other_ids)
+            ))
+            purge_pages(*(
+                page_path('posts:profile', username)
+                for username in User.objects.filter(
+                    pk__in=other_ids
+                ).values_list('username', flat=True)
+            ))
+            if field == 'user_id':
+                # Авторы потеряли подписчика и могли вернуться в лимит.
+                for author_id in other_ids:
+                    feed.restore_fanout(author_id)
+    return deleted
+
+
+def delete_user(user_id, batch_size=None, progress=None):
+    """Удаляет пользователя и все его записи; возвращает Counter
+    удаленных строк. progress(stage, deleted) вызывается по ходу.
+    """
+    deleted = Counter()
+
+    def report(stage, posts=None):
+        if progress is not None:
+            progress(stage, deleted + (posts or Counter()))
+
+    # Сразу закрывает вход: пока идет удаление, новых записей не будет.
+    if not User.objects.filter(pk=user_id).update(is_active=False):
+        return deleted
+    deleted['comments'] += delete_comments(
+        Comment.objects.filter(author_id=user_id), batch_size
+    )
+    report('comments')
+    deleted.update(delete_posts(
+        Post.objects.filter(author_id=user_id), batch_size, report
+    ))
+    report('posts')
+    deleted['follows'] += delete_follows(user_id, batch_size)
+    report('follows')
+    delete_in_batches(FeedItem.objects.filter(user_id=user_id), batch_size)
+    # Остались только служебные связи: счетчики, группы и права, журнал
+    # админки — их удаляет обычный каскад.
+    User.objects.filter(pk=user_id).delete()
+    deleted['users'] += 1
+    report('user')
+    return deleted
+
+
+def get_deletion_progress(user_id):
+    """Ход фонового удаления: {'status', 'stage', 'deleted'} по последней
+    задаче удаления пользователя или None, если ее не ставили.
+    """
+    job_obj = find_jobs(delete_user_job, user_id).first()
+    if job_obj is None:
+        return None
+    progress = json.loads(job_obj.progress or '{}')
+    return {
+        'status': job_obj.status,
+        'stage': progress.get('stage'),
+        'deleted': progress.get('deleted', {}),
+    }
+
+
+@job
+def delete_user_job(user_id):
+    def progress(stage, deleted):
+        report_progress({'stage': stage, 'deleted': dict(deleted)})
+
+    delete_user(user_id, progress=progress)
+
+
+def queue_user_deletion(user_id):
+    """Закрывает пользователю вход и ставит его удаление в очередь."""
+    User.objects.filter(pk=user_id).update(is_active=False)
+    enqueue(delete_user_job, user_id)
+
+
+@job
+def delete_post_job(post_id):
+    delete_posts(Post.objects.filter(pk=post_id))
+
+
+def schedule_post_deletion(post):
+    """Удаляет пост сразу, если его комментарии и записи лент умещаются
+    в одну пачку DELETION_BATCH_SIZE, иначе — фоновой задачей: число
+    запросов запроса не должно расти с числом комментариев. Возвращает
+    True, если удаление отложено.
+    """
+    records = max(
+        Comment.objects.filter(post_id=post.pk).count(),
+        FeedItem.objects.filter(post_id=post.pk).count(),
+    )
+    if records <= settings.DELETION_BATCH_SIZE:
+        delete_posts(Post.objects.filter(pk=post.pk))
+        return False
+    enqueue(delete_post_job, post.pk)
+    return True
+
+
+def schedule_user_deletion(user):
+    """Удаляет пользователя сразу, а если записей у него больше
+    settings.DELETION_ASYNC_THRESHOLD — фоновой задачей. Возвращает True,
+    если удаление отложено.
+    """
+    # Не user.stats: объект пользователя мог быть загружен давно.
+    stats = (
+        UserStats.objects.filter(user_id=user.pk).first()
+        or reconcile_stats(user.pk)
+    )
+    records = (
+        stats.post_count + stats.comment_count
+        + stats.follower_count + stats.following_count
+    )
+    if records <= settings.DELETION_ASYNC_THRESHOLD:
+        delete_user(user.pk)
+        return False
+    queue_user_deletion(user.pk)
+    return True
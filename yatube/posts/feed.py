@@ -0,0 +1,228 @@
+"""Материализованная лента подписок (fan-out-on-write).
+
+Новый пост сразу раскладывается в FeedItem всех подписчиков автора,
+поэтому /follow/ читает готовый список вместо соединения Post и Follow.
+Авторы, у которых подписчиков больше settings.FEED_FANOUT_LIMIT, не
+раскладываются: их посты подмешиваются в ленту при чтении (fan-out-on-read).
+Число подписчиков берется из счетчика UserStats.follower_count.
+
+Дописывание в ленты уже опубликованных постов — после подписки и когда
+автор после отписок снова укладывается в лимит — выполняют фоновые задачи
+и только для settings.FEED_BACKFILL_LIMIT последних постов автора. До тех
+пор у подписки сброшен Follow.feed_filled, и посты автора подмешиваются
+в ленту при чтении.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, Q
+
+from jobs.models import Job
+from jobs.queue import enqueue, find_jobs, job
+
+from .models import FeedItem, Follow, Post, UserStats
+from .utils import FEED_KEY, bulk_batch_size
+
+BATCH_SIZE = 1000
+# Ключ сортировки материализованной ленты: копии pub_date и id поста
+# в FeedItem, чтобы страница читалась по индексу (user, pub_date, post).
+MATERIALIZED_FEED_KEY = ('feed_pub_date', 'feed_post_id')
+
+
+def follower_count(author_id):
+    return UserStats.objects.filter(user_id=author_id).values_list(
+        'follower_count', flat=True
+    ).first() or 0
+
+
+def is_fanout_author(author_id):
+    """Раскладывать ли посты автора по лентам подписчиков при записи."""
+    return follower_count(author_id) <= settings.FEED_FANOUT_LIMIT
+
+
+def recent_posts(author_id, limit):
+    """(id, pub_date) последних limit постов автора; limit=None — всех."""
+    return Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', 'pub_date')[:limit]
+
+
+def fan_out_post(post):
+    """Добавляет новый пост в ленты всех подписчиков автора."""
+    if not is_fanout_author(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in follower_ids
+        ),
+        batch_size=bulk_batch_size(FeedItem, BATCH_SIZE),
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_posts(posts):
+    """fan_out_post для пачки новых постов: подписчики всех авторов
+    пачки читаются одним запросом.
+    """
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    fanout_authors = UserStats.objects.filter(
+        user_id__in=by_author,
+        follower_count__lte=settings.FEED_FANOUT_LIMIT,
+    ).values('user_id')
+    follows = Follow.objects.filter(
+        author_id__in=fanout_authors
+    ).values_list('author_id', 'user_id')
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(user_id=user_id, post=post, pub_date=post.pub_date)
+            for author_id, user_id in follows
+            for post in by_author[author_id]
+        ),
+        batch_size=bulk_batch_size(FeedItem, BATCH_SIZE),
+        ignore_conflicts=True,
+    )
+
+
+def add_author_to_feed(user_id, author_id, limit=None):
+    """Добавляет в ленту пользователя уже опубликованные посты автора
+    (limit последних или все).
+    """
+    if not is_fanout_author(author_id):
+        return
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in recent_posts(author_id, limit)
+        ),
+        batch_size=bulk_batch_size(FeedItem, BATCH_SIZE),
+        ignore_conflicts=True,
+    )
+
+
+@job
+def add_author_to_feed_job(user_id, author_id):
+    """Фоновая часть подписки: последние посты автора в ленту."""
+    follow = Follow.objects.filter(user_id=user_id, author_id=author_id)
+    if follow.exists():
+        add_author_to_feed(
+            user_id, author_id, settings.FEED_BACKFILL_LIMIT
+        )
+        follow.update(feed_filled=True)
+
+
+def schedule_author_backfill(user_id, author_id):
+    """Ставит в очередь добавление постов автора в ленту подписчика."""
+    enqueue(add_author_to_feed_job, user_id, author_id)
+
+
+def restore_fanout(author_id, removed=1):
+    """Если после ухода removed подписчиков автор снова укладывается
+    в FEED_FANOUT_LIMIT, ставит в очередь дописывание его постов в ленты
+    подписчиков: пока он читался при чтении, новые посты по лентам не
+    раскладывались. Вызывается после уменьшения счетчика подписчиков.
+    """
+    followers = follower_count(author_id)
+    if not followers <= settings.FEED_FANOUT_LIMIT < followers + removed:
+        return
+    Follow.objects.filter(author_id=author_id).update(feed_filled=False)
+    if not find_jobs(restore_fanout_job, author_id).filter(
+        status=Job.PENDING
+    ).exists():
+        enqueue(restore_fanout_job, author_id)
+
+
+@job
+def restore_fanout_job(author_id):
+    """Дописывает последние FEED_BACKFILL_LIMIT постов автора в ленты всех
+    подписчиков, если он все еще укладывается в лимит.
+    """
+    follows = Follow.objects.filter(author_id=author_id, feed_filled=False)
+    if not is_fanout_author(author_id):
+        follows.update(feed_filled=True)
+        return
+    follower_ids = list(follows.values_list('user_id', flat=True))
+    posts = list(recent_posts(author_id, settings.FEED_BACKFILL_LIMIT))
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for user_id in follower_ids
+            for post_id, pub_date in posts
+        ),
+        batch_size=bulk_batch_size(FeedItem, BATCH_SIZE),
+        ignore_conflicts=True,
+    )
+    follows.filter(user_id__in=follower_ids).update(feed_filled=True)
+
+
+def remove_author_from_feed(user_id, author_id):
+    """Убирает из ленты пользователя посты автора после отписки."""
+    FeedItem.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild_feed(user_id):
+    """Пересобирает ленту пользователя с нуля по текущим подпискам."""
+    FeedItem.objects.filter(user_id=user_id).delete()
+    author_ids = Follow.objects.filter(
+        user_id=user_id
+    ).values_list('author_id', flat=True)
+    for author_id in author_ids:
+        add_author_to_feed(user_id, author_id)
+    Follow.objects.filter(user_id=user_id).update(feed_filled=True)
+
+
+def fill_feeds(follows):
+    """Раскладывает по лентам посты авторов из подписок queryset follows
+    одним INSERT ... SELECT; для массовых загрузок, которые проходят мимо
+    сигналов Follow. Записей этих подписок в лентах еще не должно быть.
+    """
+    fan_in_authors = Follow.objects.values('author_id').annotate(
+        followers=Count('pk')
+    ).filter(followers__gt=settings.FEED_FANOUT_LIMIT).values('author_id')
+    select = Post.objects.filter(
+        author__following__in=follows
+    ).exclude(
+        author_id__in=fan_in_authors
+    ).values_list('author__following__user_id', 'pk', 'pub_date')
+    sql, params = select.query.sql_with_params()
+    feed_item = FeedItem._meta
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {feed_item.db_table} (user_id, post_id, pub_date) '
+            f'{sql}',
+            params
+        )
+    follows.update(feed_filled=True)
+
+
+def get_follow_feed(user):
+    """Посты ленты подписок и ключ их сортировки для пагинатора.
+
+    Если пользователь не подписан на «больших» авторов и все его подписки
+    уже разложены (feed_filled), лента целиком материализована и читается
+    диапазоном по индексу FeedItem. Иначе к ней подмешиваются посты таких
+    авторов, и сортировка идет по Post.
+    """
+    fan_in_authors = list(Follow.objects.filter(user=user).filter(
+        Q(feed_filled=False)
+        | Q(author__stats__follower_count__gt=settings.FEED_FANOUT_LIMIT)
+    ).values_list('author_id', flat=True))
+    if not fan_in_authors:
+        posts = Post.objects.filter(feed_items__user=user).annotate(
+            feed_pub_date=F('feed_items__pub_date'),
+            feed_post_id=F('feed_items__post_id'),
+        )
+        return posts, MATERIALIZED_FEED_KEY
+    posts = Post.objects.filter(
+        Q(pk__in=FeedItem.objects.filter(user=user).values('post_id'))
+        | Q(author__in=fan_in_authors)
+    )
+    return posts, FEED_KEY
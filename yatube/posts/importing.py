@@ -0,0 +1,319 @@
+"""Потоковый импорт постов и комментариев из NDJSON и CSV.
+
+Файл читается построчно и обрабатывается пачками, каждая пачка — в своей
+транзакции, поэтому память не зависит от размера файла, а прерванный
+импорт можно просто запустить снова. Записи с id, уже встречавшимся в
+ImportedObject, пропускаются. Авторы и группы ищутся через словари в
+памяти, которые дополняются одним запросом на пачку.
+
+Поля поста: id, author (username), text, pub_date (ISO 8601), group
+(slug, необязательно) и image (путь к файлу, необязательно). Поля
+комментария: id, post (id поста в источнике), author, text, pub_date.
+
+Записи вставляются bulk_create без сигналов, поэтому то, что обычно
+делают сигналы, — счетчики, поисковый индекс, ленты подписок, миниатюры
+и сброс кэша страниц — выполняется здесь же один раз на пачку.
+"""
+import csv
+import json
+import os
+from collections import Counter
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.page_cache import purge_pages
+
+from . import search
+from .cache import page_path, purge_feeds
+from .feed import fan_out_posts
+from .models import Comment, Group, ImportedObject, Post, User, UserStats
+from .seeding import keep_dates, last_pk, new_pks
+from .stats import change_stats_many
+from .thumbnails import schedule_thumbnails
+from .utils import bulk_batch_size
+
+FORMATS = ('ndjson', 'csv')
+
+
+class RowError(ValueError):
+    """Запись нельзя импортировать; пачка при этом продолжается."""
+
+
+def read_rows(path, file_format=None):
+    """Записи файла по одной: (номер строки, dict или None для битой)."""
+    if file_format is None:
+        file_format = 'csv' if path.lower().endswith('.csv') else 'ndjson'
+    with open(path, encoding='utf-8', newline='') as file:
+        if file_format == 'csv':
+            yield from enumerate(csv.DictReader(file), 2)
+            return
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row if isinstance(row, dict) else None
+
+
+class ImportReport:
+    """Счетчики импорта и первые ошибки для отчета команды."""
+    MAX_ERRORS = 20
+
+    def __init__(self):
+        self.read = 0
+        self.created = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, source, number, message):
+        self.failed += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(f'{source}:{number}: {message}')
+
+
+class Importer:
+    """Общий ход импорта: проверка, пропуск дублей, вставка, отметка."""
+    model = None
+    kind = None
+    required = ('id', 'author', 'text', 'pub_date')
+
+    def __init__(self, report, batch_size=1000, create_missing=False,
+                 images_dir=None):
+        self.report = report
+        self.batch_size = batch_size
+        self.create_missing = create_missing
+        self.images_dir = images_dir
+        self.authors = {}
+
+    def run(self, path, file_format=None):
+        rows = read_rows(path, file_format)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return
+            with transaction.atomic():
+                self.import_batch(path, batch)
+
+    def clean(self, row):
+        if row is None:
+            raise RowError('строка не разбирается')
+        missing = [
+            field for field in self.required
+            if row.get(field) is None or not str(row[field]).strip()
+        ]
+        if missing:
+            raise RowError(f'нет полей: {", ".join(missing)}')
+        pub_date = parse_datetime(str(row['pub_date']))
+        if pub_date is None:
+            raise RowError(f'неверная дата: {row["pub_date"]}')
+        if timezone.is_naive(pub_date):
+            pub_date = timezone.make_aware(pub_date)
+        return dict(row, id=str(row['id']).strip(), pub_date=pub_date)
+
+    def import_batch(self, source, batch):
+        self.report.read += len(batch)
+        rows = {}
+        for number, row in batch:
+            try:
+                row = self.clean(row)
+            except RowError as error:
+                self.report.error(source, number, error)
+                continue
+            if row['id'] in rows:
+                self.report.skipped += 1
+                continue
+            rows[row['id']] = number, row
+        imported = set(ImportedObject.objects.filter(
+            kind=self.kind, source_id__in=list(rows)
+        ).values_list('source_id', flat=True))
+        self.report.skipped += len(imported)
+        rows = [value for key, value in rows.items() if key not in imported]
+        self.resolve(row for _, row in rows)
+        objs = {}
+        for number, row in rows:
+            try:
+                objs[row['id']] = self.build(row)
+            except RowError as error:
+                self.report.error(source, number, error)
+        if not objs:
+            return
+        created = self.insert(list(objs.values()))
+        ImportedObject.objects.bulk_create(
+            (
+                ImportedObject(
+                    kind=self.kind, source_id=source_id, object_id=obj.pk
+                )
+                for source_id, obj in zip(objs, created)
+            ),
+            batch_size=bulk_batch_size(ImportedObject, self.batch_size),
+        )
+        self.report.created += len(created)
+        self.after_insert(created)
+
+    def insert(self, objs):
+        """bulk_create с сохранением дат; id вставленных строк на базах,
+        которые их не возвращают, берутся из диапазона после вставки.
+        """
+        inserted_from = last_pk(self.model)
+        with keep_dates(self.model._meta.get_field('pub_date')):
+            self.model.objects.bulk_create(
+                objs, batch_size=bulk_batch_size(self.model, self.batch_size)
+            )
+        if objs[0].pk is None:
+            for obj, pk in zip(objs, new_pks(self.model, inserted_from)):
+                obj.pk = pk
+        return objs
+
+    def resolve(self, rows):
+        """Дополняет словари поиска значениями из пачки."""
+        created = self.resolve_map(
+            self.authors, User, 'username', {row['author'] for row in rows},
+            lambda username: User(username=username),
+        )
+        # Сигнал user_saved не срабатывает при bulk_create.
+        UserStats.objects.bulk_create(
+            UserStats(user_id=self.authors[username])
+            for username in created
+        )
+
+    def resolve_map(self, lookup, model, field, values, make):
+        """Ищет недостающие в lookup значения field одним запросом; с
+        create_missing создает ненайденные. Возвращает созданные значения.
+        """
+        missing = {value for value in values if value not in lookup}
+        if not missing:
+            return set()
+        found = dict(model.objects.filter(
+            **{f'{field}__in': missing}
+        ).values_list(field, 'pk'))
+        created = set()
+        if self.create_missing and len(found) < len(missing):
+            created = missing - set(found)
+            model.objects.bulk_create(make(value) for value in created)
+            found = dict(model.objects.filter(
+                **{f'{field}__in': missing}
+            ).values_list(field, 'pk'))
+        lookup.update(found)
+        return created
+
+    def author_id(self, row):
+        if row['author'] not in self.authors:
+            raise RowError(f'нет пользователя {row["author"]}')
+        return self.authors[row['author']]
+
+    def build(self, row):
+        raise NotImplementedError
+
+    def after_insert(self, objs):
+        raise NotImplementedError
+
+
+class PostImporter(Importer):
+    model = Post
+    kind = ImportedObject.POST
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.groups = {}
+
+    def resolve(self, rows):
+        rows = list(rows)
+        super().resolve(rows)
+        self.resolve_map(
+            self.groups, Group, 'slug',
+            {row['group'] for row in rows if row.get('group')},
+            lambda slug: Group(title=slug, slug=slug),
+        )
+
+    def build(self, row):
+        group_id = None
+        if row.get('group'):
+            if row['group'] not in self.groups:
+                raise RowError(f'нет группы {row["group"]}')
+            group_id = self.groups[row['group']]
+        return Post(
+            author_id=self.author_id(row),
+            group_id=group_id,
+            text=row['text'],
+            pub_date=row['pub_date'],
+            image=self.store_image(row.get('image')),
+        )
+
+    def store_image(self, image):
+        """Копирует картинку из images_dir в хранилище; без images_dir
+        путь считается уже лежащим в хранилище.
+        """
+        if not image:
+            return ''
+        if self.images_dir is None:
+            return image
+        path = os.path.join(self.images_dir, image)
+        if not os.path.isfile(path):
+            raise RowError(f'нет файла картинки {image}')
+        with open(path, 'rb') as file:
+            return default_storage.save(
+                f'posts/{os.path.basename(image)}', File(file)
+            )
+
+    def after_insert(self, posts):
+        search.index_posts((post.pk, post.text) for post in posts)
+        fan_out_posts(posts)
+        for post in posts:
+            if post.image:
+                schedule_thumbnails(post)
+        authors = Counter(post.author_id for post in posts)
+        change_stats_many('post_count', authors)
+        purge_feeds(
+            list(authors),
+            {post.group_id for post in posts if post.group_id},
+        )
+
+
+class CommentImporter(Importer):
+    model = Comment
+    kind = ImportedObject.COMMENT
+    required = Importer.required + ('post',)
+
+    def resolve(self, rows):
+        rows = list(rows)
+        super().resolve(rows)
+        # id постов нужны только этой пачке, поэтому словарь не копится.
+        posts = dict(ImportedObject.objects.filter(
+            kind=ImportedObject.POST,
+            source_id__in={str(row['post']).strip() for row in rows},
+        ).values_list('source_id', 'object_id'))
+        existing = set(Post.objects.filter(
+            pk__in=posts.values()
+        ).values_list('pk', flat=True))
+        self.posts = {
+            source_id: post_id for source_id, post_id in posts.items()
+            if post_id in existing
+        }
+
+    def build(self, row):
+        post_id = self.posts.get(str(row['post']).strip())
+        if post_id is None:
+            raise RowError(f'нет поста {row["post"]}')
+        return Comment(
+            post_id=post_id,
+            author_id=self.author_id(row),
+            text=row['text'],
+            pub_date=row['pub_date'],
+        )
+
+    def after_insert(self, comments):
+        change_stats_many('comment_count', Counter(
+            comment.author_id for comment in comments
+        ))
+        purge_pages(*(
+            page_path('posts:post_detail', post_id)
+            for post_id in {comment.post_id for comment in comments}
+        ))
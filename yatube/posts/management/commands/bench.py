@@ -0,0 +1,145 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from posts.bench import VIEWS, compare_reports, run_benchmarks
+from posts.seeding import seed_dataset
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет временную базу синтетическими данными и замеряет '
+        'задержку, число запросов и память представлений posts; отчет '
+        'пишется в JSON'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in (
+            ('users', 1000), ('groups', 20), ('posts', 20000),
+            ('comments', 50000), ('follows', 5000),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать: {name} (по умолчанию {default})',
+            )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed генератора набора данных',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=30,
+            help='Замеров времени на сценарий',
+        )
+        parser.add_argument(
+            '--depths', type=int, nargs='+', default=[1, 10, 100],
+            help='Глубина лент в страницах',
+        )
+        parser.add_argument(
+            '--views', nargs='+', choices=VIEWS, default=list(VIEWS),
+            help='Какие представления замерять',
+        )
+        parser.add_argument(
+            '--output', default='bench.json', help='Файл JSON-отчета',
+        )
+        parser.add_argument(
+            '--compare', help='Отчет прошлого прогона для сравнения',
+        )
+
+    def handle(self, *args, **options):
+        # Временная база и свой кэш: рабочие данные и кэш не затрагиваются.
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            with override_settings(
+                DEBUG=False,
+                DATABASE_REPLICAS=[],
+                QUERY_BUDGET_STRICT=False,
+                ALLOWED_HOSTS=['testserver'],
+                CACHES={'default': {
+                    'BACKEND':
+                        'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'bench',
+                }},
+            ):
+                started = timezone.now()
+                dataset = seed_dataset(
+                    users=options['users'], groups=options['groups'],
+                    posts=options['posts'], comments=options['comments'],
+                    follows=options['follows'], seed=options['seed'],
+                )
+                self.stdout.write(
+                    f'Набор данных: {dataset}, '
+                    f'{(timezone.now() - started).total_seconds():.1f} с'
+                )
+                results = run_benchmarks(
+                    repeat=options['repeat'], depths=options['depths'],
+                    views=options['views'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        report = {
+            'meta': {
+                'revision': git_revision(),
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'dataset': dataset,
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.write_results(results)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                self.write_comparison(compare_reports(json.load(file), report))
+        self.stdout.write(
+            self.style.SUCCESS(f'Отчет записан в {options["output"]}')
+        )
+
+    def write_results(self, results):
+        self.stdout.write(
+            f'{"представление":<14} {"режим":<7} {"глуб.":>5} {"код":>4} '
+            f'{"запр.":>5} {"p50, мс":>8} {"p90, мс":>8} {"p99, мс":>8} '
+            f'{"КиБ":>8}'
+        )
+        for result in results:
+            latency = result['latency_ms']
+            self.stdout.write(
+                f'{result["view"]:<14} {result["mode"]:<7} '
+                f'{result["depth"]:>5} {result["status"]:>4} '
+                f'{result["queries"]:>5} {latency["p50"]:>8.2f} '
+                f'{latency["p90"]:>8.2f} {latency["p99"]:>8.2f} '
+                f'{result["peak_memory_kib"]:>8.1f}'
+            )
+
+    def write_comparison(self, rows):
+        self.stdout.write('Сравнение с прошлым отчетом (p50, запросы):')
+        for view, mode, depth, old_p50, p50, old_queries, queries in rows:
+            change = (p50 - old_p50) / old_p50 * 100 if old_p50 else 0
+            self.stdout.write(
+                f'{view:<14} {mode:<7} {depth:>5} {old_p50:>8.2f} -> '
+                f'{p50:>8.2f} мс ({change:+.1f}%), '
+                f'запросов {old_queries} -> {queries}'
+            )
@@ -0,0 +1,119 @@
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.template import Context, Template
+from django.utils import timezone
+
+from posts.cards import render_cards
+from posts.models import Group, Post, User
+
+# Карточка до перехода на posts.cards: include в цикле и {% url %} внутри.
+LEGACY_CARD = (
+    '<article><ul><li>Автор: {{ post.author.get_full_name }}'
+    '{% if not profile_flag %}'
+    '<a href="{% url \'posts:profile\' post.author %}">'
+    'все посты пользователя</a>{% endif %}</li>'
+    '<li>Дата публикации: {{ post.pub_date|date:"d E Y" }}</li></ul>'
+    '{% if post.image %}<img src="{{ post.image.url }}">{% endif %}'
+    '<p>{{ post.text|linebreaksbr }}<br></p>'
+    '<a href="{% url \'posts:post_detail\' post.pk %}">'
+    'подробная информация</a><br>'
+    '{% if not group_list_flag %}{% if post.group %}'
+    '<a href="{% url \'posts:group_list\' post.group.slug %}">'
+    'все записи группы {{ post.group.title }}</a>'
+    '{% else %}<span>Этой публикации нет ни в одном сообществе.</span>'
+    '{% endif %}{% endif %}</article>'
+)
+LEGACY_FEED = (
+    '{% for post in posts %}{% include card %}'
+    '{% if not forloop.last %}<hr>{% endif %}{% endfor %}'
+)
+CARDS_FEED = (
+    '{% for card in cards %}{{ card }}'
+    '{% if not forloop.last %}<hr>{% endif %}{% endfor %}'
+)
+
+
+def make_posts(amount):
+    """Посты в памяти, без базы: сравнивается только рендеринг."""
+    now = timezone.now()
+    groups = [
+        Group(pk=number, slug=f'group_{number}', title=f'Группа {number}')
+        for number in range(1, 6)
+    ]
+    authors = [
+        User(pk=number, username=f'author_{number}', first_name='Автор')
+        for number in range(1, 11)
+    ]
+    return [
+        Post(
+            pk=number, text=f'Тестовый пост {number}\n' * 5,
+            pub_date=now, updated_at=now,
+            author=authors[number % len(authors)],
+            group=groups[number % len(groups)] if number % 3 else None,
+        )
+        for number in range(1, amount + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает рендеринг ленты: include карточки в цикле против '
+        '{% post_cards %} с холодным и теплым кэшем карточек'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cards', type=int, nargs='+', default=[10, 50, 100],
+            help='Сколько карточек на странице',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Повторов каждого замера, берется лучший',
+        )
+
+    def best_time(self, render, repeat, before=None):
+        times = []
+        for _ in range(repeat):
+            if before is not None:
+                before()
+            started = time.perf_counter()
+            render()
+            times.append(time.perf_counter() - started)
+        return min(times) * 1000
+
+    def handle(self, *args, **options):
+        legacy_feed = Template(LEGACY_FEED)
+        legacy_card = Template(LEGACY_CARD)
+        cards_feed = Template(CARDS_FEED)
+        card_cache = LocMemCache('bench-cards', {})
+
+        def render_batched(posts):
+            return cards_feed.render(Context({
+                'cards': render_cards(posts, cache_backend=card_cache)
+            }))
+
+        self.stdout.write(
+            f'{"карточек":>9} {"include, мс":>12} {"холодный, мс":>13} '
+            f'{"теплый, мс":>11} {"ускорение":>10}'
+        )
+        for amount in options['cards']:
+            posts = make_posts(amount)
+            legacy = self.best_time(
+                lambda: legacy_feed.render(
+                    Context({'posts': posts, 'card': legacy_card})
+                ),
+                options['repeat'],
+            )
+            cold = self.best_time(
+                lambda: render_batched(posts),
+                options['repeat'], before=card_cache.clear,
+            )
+            warm = self.best_time(
+                lambda: render_batched(posts), options['repeat']
+            )
+            self.stdout.write(
+                f'{amount:>9} {legacy:>12.2f} {cold:>13.2f} {warm:>11.2f} '
+                f'{legacy / warm:>9.1f}x'
+            )
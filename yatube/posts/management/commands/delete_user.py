@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.deletion import delete_user, queue_user_deletion
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователя со всеми постами, комментариями и подписками '
+        'пачками, сохраняя счетчики и кэш согласованными'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Имя пользователя')
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Строк в одном DELETE; по умолчанию DELETION_BATCH_SIZE',
+        )
+        parser.add_argument(
+            '--background', action='store_true',
+            help='Поставить удаление в очередь фоновых задач',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f'Нет пользователя {options["username"]}')
+        if options['background']:
+            queue_user_deletion(user.pk)
+            self.stdout.write(self.style.SUCCESS(
+                f'Удаление поставлено в очередь; ход — '
+                f'get_deletion_progress({user.pk})'
+            ))
+            return
+        self.started = time.perf_counter()
+        deleted = delete_user(
+            user.pk, batch_size=options['batch_size'],
+            progress=self.progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено: {dict(deleted)} за '
+            f'{time.perf_counter() - self.started:.1f} с'
+        ))
+
+    def progress(self, stage, deleted):
+        self.stdout.write(
+            f'{stage}: {dict(deleted)}, '
+            f'{time.perf_counter() - self.started:.1f} с'
+        )
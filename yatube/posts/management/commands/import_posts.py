@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importing import (
+    FORMATS, CommentImporter, ImportReport, PostImporter
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует посты и комментарии из NDJSON или CSV; '
+        'повторный запуск пропускает уже загруженные записи'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', nargs='+', default=[], metavar='FILE',
+            help='Файлы постов',
+        )
+        parser.add_argument(
+            '--comments', nargs='+', default=[], metavar='FILE',
+            help='Файлы комментариев; загружаются после постов',
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файлов; по умолчанию — по расширению',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Записей в одной транзакции',
+        )
+        parser.add_argument(
+            '--images-dir',
+            help='Каталог с картинками постов; поле image — путь в нем',
+        )
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Создавать неизвестных авторов и группы',
+        )
+
+    def handle(self, *args, **options):
+        if not options['posts'] and not options['comments']:
+            raise CommandError('Укажите файлы --posts и/или --comments')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        for importer_class, paths in (
+            (PostImporter, options['posts']),
+            (CommentImporter, options['comments']),
+        ):
+            for path in paths:
+                self.import_file(importer_class, path, options)
+
+    def import_file(self, importer_class, path, options):
+        report = ImportReport()
+        importer = importer_class(
+            report,
+            batch_size=options['batch_size'],
+            create_missing=options['create_missing'],
+            images_dir=options['images_dir'],
+        )
+        started = time.perf_counter()
+        try:
+            importer.run(path, options['format'])
+        except OSError as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+        seconds = time.perf_counter() - started
+        for error in report.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'{path}: прочитано {report.read}, создано {report.created}, '
+            f'пропущено повторов {report.skipped}, ошибок {report.failed} '
+            f'за {seconds:.1f} с ({report.read / max(seconds, 1e-9):.0f} '
+            'записей/с)'
+        ))
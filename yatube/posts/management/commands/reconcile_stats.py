@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import User, UserStats
+from posts.stats import count_stats, reconcile_stats
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счетчики пользователей с таблицами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help='Имена пользователей; по умолчанию — все',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        fixed = 0
+        for user_id in users.values_list('pk', flat=True).iterator():
+            expected = count_stats(user_id)
+            stats = UserStats.objects.filter(user_id=user_id).first()
+            if stats is None or any(
+                getattr(stats, field) != value
+                for field, value in expected.items()
+            ):
+                reconcile_stats(user_id)
+                fixed += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счетчиков: {fixed}')
+        )
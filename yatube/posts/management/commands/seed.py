@@ -0,0 +1,84 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import User
+from posts.seeding import seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками со степенным распределением '
+        'популярности'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in (
+            ('users', 10000), ('groups', 50), ('posts', 100000),
+            ('comments', 300000), ('follows', 50000),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать: {name} (по умолчанию {default})',
+            )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed генератора: одинаковый seed — одинаковые данные',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=3.0,
+            help='Неравномерность популярности, 1 — равномерно',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределить публикации',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Процессов для генерации текстов',
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имен пользователей и адресов групп',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Разрешить запуск при DEBUG = False',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError(
+                'DEBUG выключен — похоже на рабочую базу. '
+                'Запустите с --force, если это не так.'
+            )
+        if options['skew'] < 1:
+            raise CommandError('--skew должен быть не меньше 1')
+        prefix = options['prefix']
+        if User.objects.filter(
+            username__startswith=f'{prefix}_user_'
+        ).exists():
+            raise CommandError(
+                f'Данные с префиксом {prefix} уже есть, '
+                'задайте другой --prefix'
+            )
+        started = time.perf_counter()
+        dataset = seed_dataset(
+            users=options['users'], groups=options['groups'],
+            posts=options['posts'], comments=options['comments'],
+            follows=options['follows'], seed=options['seed'],
+            prefix=prefix, days=options['days'], skew=options['skew'],
+            workers=max(1, options['workers']), progress=self.progress,
+        )
+        seconds = time.perf_counter() - started
+        rows = sum(dataset.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано строк: {rows} за {seconds:.1f} с '
+            f'({rows / max(seconds, 1e-9):.0f} строк/с)'
+        ))
+
+    def progress(self, stage, rows, seconds):
+        self.stdout.write(f'{stage}: {rows} за {seconds:.1f} с')
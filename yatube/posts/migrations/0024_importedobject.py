@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_auto_20261018_0850'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedObject',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=16, verbose_name='Тип')),
+                ('source_id', models.CharField(max_length=64, verbose_name='id в источнике')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+            ],
+            options={
+                'verbose_name': 'Импортированный объект',
+                'verbose_name_plural': 'Импортированные объекты',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importedobject',
+            constraint=models.UniqueConstraint(fields=('kind', 'source_id'), name='posts_importedobject_unique_source'),
+        ),
+    ]
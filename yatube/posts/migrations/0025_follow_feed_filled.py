@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_importedobject'),
+    ]
+
+    operations = [
+        # Ленты существующих подписок уже заполнены при подписке.
+        migrations.AddField(
+            model_name='follow',
+            name='feed_filled',
+            field=models.BooleanField(default=True, verbose_name='посты в ленте'),
+        ),
+        migrations.AlterField(
+            model_name='follow',
+            name='feed_filled',
+            field=models.BooleanField(default=False, verbose_name='посты в ленте'),
+        ),
+    ]
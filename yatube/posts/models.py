@@ -19,10 +19,17 @@ class Comment(models.Model):
     )
     text = models.TextField('Текст комментария')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                name='posts_comment_post_pub_date',
+                fields=['post', 'pub_date', 'id']
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -43,6 +50,9 @@ class Follow(models.Model):
         verbose_name='подписка',
         related_name='following'
     )
+    # Пока фоновая задача не дописала посты автора в ленту подписчика, они
+    # читаются при чтении, как посты «больших» авторов.
+    feed_filled = models.BooleanField('посты в ленте', default=False)
 
     class Meta:
         verbose_name = 'Подписка'
@@ -78,6 +88,7 @@ class Group(models.Model):
 class Post(models.Model):
     text = models.TextField('Текст поста')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -97,11 +108,125 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnail_url = models.CharField(
+        'Адрес миниатюры',
+        max_length=255,
+        blank=True,
+        editable=False
+    )
+    thumbnail_width = models.PositiveIntegerField(
+        'Ширина миниатюры',
+        null=True,
+        editable=False
+    )
+    thumbnail_height = models.PositiveIntegerField(
+        'Высота миниатюры',
+        null=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                name='posts_post_pub_date_id',
+                fields=['-pub_date', '-id']
+            ),
+            models.Index(
+                name='posts_post_author_pub_date',
+                fields=['author', '-pub_date', '-id']
+            ),
+            models.Index(
+                name='posts_post_group_pub_date',
+                fields=['group', '-pub_date', '-id']
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
+
+
+class FeedItem(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Читатель',
+        related_name='feed_items'
+    )
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='feed_items'
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        indexes = [
+            models.Index(
+                name='posts_feeditem_user_pub_date',
+                fields=['user', '-pub_date', '-post']
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                name='posts_feeditem_unique_item',
+                fields=['user', 'post']
+            )
+        ]
+
+    def __str__(self):
+        return f'пост {self.post_id} в ленте {self.user}'
+
+
+class UserStats(models.Model):
+    """Денормализованные счетчики пользователя для профиля и поста."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Пользователь',
+        related_name='stats'
+    )
+    post_count = models.IntegerField('Постов', default=0)
+    follower_count = models.IntegerField('Подписчиков', default=0)
+    following_count = models.IntegerField('Подписок', default=0)
+    comment_count = models.IntegerField('Комментариев', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return f'статистика {self.user}'
+
+
+class ImportedObject(models.Model):
+    """Пост или комментарий, перенесенный import_posts, и его id в
+    источнике: по нему повторный импорт пропускает уже загруженное.
+    """
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = ((POST, 'Пост'), (COMMENT, 'Комментарий'))
+
+    kind = models.CharField('Тип', max_length=16, choices=KINDS)
+    source_id = models.CharField('id в источнике', max_length=64)
+    object_id = models.PositiveIntegerField('id объекта')
+
+    class Meta:
+        verbose_name = 'Импортированный объект'
+        verbose_name_plural = 'Импортированные объекты'
+        constraints = [
+            models.UniqueConstraint(
+                name='posts_importedobject_unique_source',
+                fields=['kind', 'source_id']
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.source_id} -> {self.object_id}'
@@ -0,0 +1,139 @@
+"""Полнотекстовый поиск по тексту постов.
+
+На SQLite обратный индекс — виртуальная таблица FTS5 posts_post_fts
+(rowid = id поста), ее обновляют сигналы сохранения и удаления поста. На
+PostgreSQL поиск идет по GIN-индексу на to_tsvector(text), который база
+поддерживает сама; условие запроса записано тем же выражением, что
+и индекс (pg_tsvector()), иначе планировщик индекс не использует. На прочих
+базах остается LIKE.
+"""
+import re
+
+from django.db import connection
+
+FTS_TABLE = 'posts_post_fts'
+SEARCH_CONFIG = 'russian'
+
+WORD = re.compile(r'\w+')
+
+
+def pg_tsvector(column):
+    """Выражение GIN-индекса PostgreSQL; поиск должен совпадать с ним."""
+    return f"to_tsvector('{SEARCH_CONFIG}', {column})"
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def create_index(schema_editor):
+    """Создает индекс для текущей базы; вызывается из миграции."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} '
+            "USING fts5(text, tokenize='unicode61')"
+        )
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX posts_post_text_search ON posts_post '
+            f"USING GIN ({pg_tsvector('text')})"
+        )
+
+
+def drop_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS posts_post_text_search')
+
+
+def index_post(post):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, text) '
+            'VALUES (%s, %s)',
+            [post.pk, post.text]
+        )
+
+
+def index_posts(rows):
+    """Индексирует пачку постов, rows — пары (id, text); для массовых
+    вставок, которые проходят мимо сигналов.
+    """
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, text) '
+            'VALUES (%s, %s)',
+            list(rows)
+        )
+
+
+def unindex_post(post_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+        )
+
+
+def unindex_posts(post_ids):
+    """unindex_post для пачки постов."""
+    post_ids = list(post_ids)
+    if not fts_available() or not post_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+            post_ids
+        )
+
+
+def fts_query(query):
+    """Превращает ввод пользователя в запрос FTS5: все слова по префиксу.
+
+    Кавычки и операторы FTS5 из ввода отбрасываются, поэтому любая строка
+    дает корректный запрос.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query))
+
+
+def search_posts(queryset, query):
+    """Посты из queryset, подходящие под запрос, — сначала более
+    релевантные. Пустой запрос ничего не находит.
+    """
+    if not WORD.search(query):
+        return queryset.none()
+    if fts_available():
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = posts_post.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[fts_query(query)],
+            select={'rank': f'bm25({FTS_TABLE})'},
+            order_by=['rank', '-pub_date'],
+        )
+    if connection.vendor == 'postgresql':
+        vector = pg_tsvector('posts_post.text')
+        search_query = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+        return queryset.extra(
+            where=[f'{vector} @@ {search_query}'],
+            params=[query],
+            select={'rank': f'ts_rank({vector}, {search_query})'},
+            select_params=[query],
+            order_by=['-rank', '-pub_date'],
+        )
+    return queryset.filter(text__icontains=query).order_by('-pub_date')
@@ -0,0 +1,298 @@
+"""Наполнение базы синтетическими данными для замеров и разработки.
+
+Пользователи, группы, посты, комментарии и подписки вставляются пачками
+через bulk_create без сигналов, поэтому производные данные — счетчики
+UserStats, индекс поиска и материализованные ленты подписок — досчитываются
+отдельно в конце, как после массового импорта.
+
+Популярность степенная: авторы постов, авторы с подписчиками, группы и
+обсуждаемые посты выбираются через skewed(), так что немногие «звезды»
+собирают большую часть подписок и комментариев. Тексты генерирует Faker,
+при workers > 1 — в пуле процессов. У каждой пачки текстов свой seed, а
+остальные случайные величины берутся из одного генератора в основном
+процессе, поэтому одинаковые параметры дают одинаковый набор данных при
+любом числе процессов.
+"""
+import multiprocessing
+import random
+import time
+from array import array
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from faker import Faker
+
+from core.page_cache import purge_pages
+
+from . import search
+from .cache import INDEX_FEED, bump_feed_versions, page_path
+from .feed import fill_feeds
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .utils import bulk_batch_size
+
+BATCH_SIZE = 5000
+LOCALE = 'ru_RU'
+POST_CHARS = 400
+COMMENT_CHARS = 160
+# Доля постов, опубликованных в группе.
+GROUP_SHARE = 0.7
+
+
+@contextmanager
+def keep_dates(*fields):
+    """Отключает auto_now_add у полей, чтобы сохранить заданные даты."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def last_pk(model):
+    return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+def new_pks(model, after):
+    """id объектов, созданных после after, в порядке вставки."""
+    return array('q', model.objects.filter(
+        pk__gt=after
+    ).order_by('pk').values_list('pk', flat=True).iterator())
+
+
+def as_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def skewed(rng, size, skew):
+    """Индекс от 0 до size - 1 со степенным распределением.
+
+    Плотность пропорциональна x ** (1 / skew - 1): при skew > 1 малые
+    индексы выпадают намного чаще, skew = 1 — равномерное распределение.
+    """
+    return int(size * rng.random() ** skew)
+
+
+def generate_texts(job):
+    """Тексты одной пачки; выполняется и в дочерних процессах."""
+    seed, count, max_chars = job
+    fake = Faker(LOCALE)
+    fake.seed_instance(seed)
+    return [fake.text(max_nb_chars=max_chars) for _ in range(count)]
+
+
+def text_batches(pool, seed, kind, total, max_chars):
+    """Пачки текстов по BATCH_SIZE в порядке номеров пачек."""
+    jobs = (
+        (f'{seed}:{kind}:{number}', min(BATCH_SIZE, total - start), max_chars)
+        for number, start in enumerate(range(0, total, BATCH_SIZE))
+    )
+    if pool is None:
+        return map(generate_texts, jobs)
+    return pool.imap(generate_texts, jobs)
+
+
+def insert(model, objs):
+    """Вставляет объекты пачками по BATCH_SIZE, не собирая их в память."""
+    objs = iter(objs)
+    inserted = 0
+    while True:
+        batch = list(islice(objs, BATCH_SIZE))
+        if not batch:
+            return inserted
+        model.objects.bulk_create(
+            batch, batch_size=bulk_batch_size(model, BATCH_SIZE)
+        )
+        inserted += len(batch)
+
+
+def rebuild_stats(users):
+    """Пересчитывает UserStats пользователей из queryset users четырьмя
+    GROUP BY.
+    """
+    counts = {user_id: {} for user_id in users.values_list('pk', flat=True)}
+    for field, model, column in (
+        ('post_count', Post, 'author_id'),
+        ('follower_count', Follow, 'author_id'),
+        ('following_count', Follow, 'user_id'),
+        ('comment_count', Comment, 'author_id'),
+    ):
+        rows = model.objects.filter(**{f'{column}__in': users}).values(
+            column
+        ).annotate(total=Count('pk')).order_by().values_list(column, 'total')
+        for user_id, total in rows:
+            counts[user_id][field] = total
+    UserStats.objects.filter(user__in=users).delete()
+    insert(UserStats, (
+        UserStats(user_id=user_id, **values)
+        for user_id, values in counts.items()
+    ))
+
+
+def index_new_posts(after):
+    """Добавляет в поисковый индекс посты с id больше after."""
+    while True:
+        rows = list(Post.objects.filter(
+            pk__gt=after
+        ).order_by('pk').values_list('pk', 'text')[:BATCH_SIZE])
+        if not rows:
+            return
+        search.index_posts(rows)
+        after = rows[-1][0]
+
+
+class Seeder:
+    """Этапы наполнения; каждый следующий опирается на id предыдущих."""
+
+    def __init__(self, seed, prefix, days, skew, pool):
+        self.seed = seed
+        self.prefix = prefix
+        self.skew = skew
+        self.pool = pool
+        self.rng = random.Random(seed)
+        self.fake = Faker(LOCALE)
+        self.fake.seed_instance(seed)
+        self.now = timezone.now().timestamp()
+        self.first_date = self.now - timedelta(days=days).total_seconds()
+        self.user_ids = array('q')
+        self.group_ids = array('q')
+        self.post_ids = array('q')
+        self.post_dates = array('d')
+
+    def popular(self, ids):
+        return ids[skewed(self.rng, len(ids), self.skew)]
+
+    def texts(self, kind, total, max_chars):
+        batches = text_batches(self.pool, self.seed, kind, total, max_chars)
+        for texts in batches:
+            yield from texts
+
+    def users(self, total):
+        users_from = last_pk(User)
+        insert(User, (
+            User(username=f'{self.prefix}_user_{number}',
+                 first_name=self.fake.first_name(),
+                 last_name=self.fake.last_name())
+            for number in range(total)
+        ))
+        self.new_users = User.objects.filter(pk__gt=users_from)
+        self.user_ids = new_pks(User, users_from)
+        # Авторы в порядке популярности: первые в списке — «звезды».
+        self.stars = array('q', self.user_ids)
+        self.rng.shuffle(self.stars)
+        return len(self.user_ids)
+
+    def groups(self, total):
+        groups_from = last_pk(Group)
+        insert(Group, (
+            Group(title=f'{self.fake.word().capitalize()} {number}',
+                  slug=f'{self.prefix}-group-{number}',
+                  description=self.fake.sentence())
+            for number in range(total)
+        ))
+        self.group_ids = new_pks(Group, groups_from)
+        return len(self.group_ids)
+
+    def make_post(self, text):
+        self.post_dates.append(
+            self.first_date + (self.now - self.first_date) * self.rng.random()
+        )
+        group_id = None
+        if self.group_ids and self.rng.random() < GROUP_SHARE:
+            group_id = self.popular(self.group_ids)
+        return Post(
+            author_id=self.popular(self.stars),
+            group_id=group_id,
+            text=text,
+            pub_date=as_datetime(self.post_dates[-1]),
+        )
+
+    def posts(self, total):
+        self.posts_from = last_pk(Post)
+        if not self.user_ids:
+            return 0
+        with keep_dates(Post._meta.get_field('pub_date')):
+            insert(Post, map(
+                self.make_post, self.texts('post', total, POST_CHARS)
+            ))
+        self.post_ids = new_pks(Post, self.posts_from)
+        # Посты в порядке обсуждаемости, как авторы в stars.
+        self.hot_posts = array('q', range(len(self.post_ids)))
+        self.rng.shuffle(self.hot_posts)
+        return len(self.post_ids)
+
+    def make_comment(self, text):
+        index = self.popular(self.hot_posts)
+        posted = self.post_dates[index]
+        return Comment(
+            post_id=self.post_ids[index],
+            author_id=self.user_ids[self.rng.randrange(len(self.user_ids))],
+            text=text,
+            pub_date=as_datetime(
+                posted + (self.now - posted) * self.rng.random()
+            ),
+        )
+
+    def comments(self, total):
+        if not self.post_ids:
+            return 0
+        with keep_dates(Comment._meta.get_field('pub_date')):
+            return insert(Comment, map(
+                self.make_comment,
+                self.texts('comment', total, COMMENT_CHARS)
+            ))
+
+    def follows(self, total):
+        pairs = set()
+        attempts = total * 10
+        while len(self.user_ids) > 1 and len(pairs) < total and attempts:
+            attempts -= 1
+            user_id = self.user_ids[self.rng.randrange(len(self.user_ids))]
+            author_id = self.popular(self.stars)
+            if user_id != author_id:
+                pairs.add((user_id, author_id))
+        return insert(Follow, (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in sorted(pairs)
+        ))
+
+    def derived(self):
+        rebuild_stats(self.new_users)
+        index_new_posts(self.posts_from)
+        fill_feeds(Follow.objects.filter(user__in=self.new_users))
+        # Ленты и профили новых пользователей и групп еще не кэшировались,
+        # а главная уже могла.
+        bump_feed_versions(INDEX_FEED)
+        purge_pages(page_path('posts:index'))
+        return len(self.user_ids)
+
+
+def seed_dataset(users=100, groups=10, posts=1000, comments=2000,
+                 follows=500, seed=0, prefix='seed', days=365, skew=3.0,
+                 workers=1, progress=None):
+    """Создает набор данных и возвращает число созданных объектов.
+
+    progress(stage, rows, seconds) вызывается после каждого этапа.
+    """
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    created = {}
+    with pool or nullcontext(), transaction.atomic():
+        seeder = Seeder(seed, prefix, days, skew, pool)
+        for stage, total in (
+            ('users', users), ('groups', groups), ('posts', posts),
+            ('comments', comments), ('follows', follows),
+            ('derived', None),
+        ):
+            started = time.perf_counter()
+            stage_method = getattr(seeder, stage)
+            rows = stage_method() if total is None else stage_method(total)
+            if progress is not None:
+                progress(stage, rows, time.perf_counter() - started)
+            if total is not None:
+                created[stage] = rows
+    return created
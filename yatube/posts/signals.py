@@ -0,0 +1,121 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from core.page_cache import purge_pages
+
+from . import feed, search
+from .cache import (
+    bump_feed_versions, bump_post_feeds, group_feed, page_path,
+    profile_feed, purge_group_pages, purge_post_pages
+)
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .stats import change_stats
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+        return
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    group_ids = instance.posts.values_list('group_id', flat=True).distinct()
+    bump_post_feeds(instance.pk, *group_ids)
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    instance._saved_group_id = instance.pk and Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    bump_post_feeds(
+        instance.author_id, instance.group_id,
+        getattr(instance, '_saved_group_id', None)
+    )
+    search.index_post(instance)
+    purge_post_pages(
+        instance, instance.group_id,
+        getattr(instance, '_saved_group_id', None)
+    )
+    if created:
+        change_stats(instance.author_id, post_count=1)
+        feed.fan_out_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_post_feeds(instance.author_id, instance.group_id)
+    change_stats(instance.author_id, post_count=-1)
+    search.unindex_post(instance.pk)
+    purge_post_pages(instance, instance.group_id)
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, **kwargs):
+    instance._saved_slug = instance.pk and Group.objects.filter(
+        pk=instance.pk
+    ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    author_ids = Post.objects.filter(
+        group_id=instance.pk
+    ).values_list('author_id', flat=True).distinct()
+    for author_id in author_ids:
+        bump_post_feeds(author_id)
+    bump_feed_versions(group_feed(instance.pk))
+    purge_group_pages(instance, getattr(instance, '_saved_slug', None))
+
+
+def purge_follow_pages(follow):
+    """Счетчики подписок выводятся в профилях обеих сторон: сдвигает их
+    поколения (валидаторы профиля) и сбрасывает кэш страниц.
+    """
+    bump_feed_versions(
+        profile_feed(follow.user_id), profile_feed(follow.author_id)
+    )
+    purge_pages(*(
+        page_path('posts:profile', username)
+        for username in User.objects.filter(
+            pk__in=(follow.user_id, follow.author_id)
+        ).values_list('username', flat=True)
+    ))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        purge_follow_pages(instance)
+        change_stats(instance.author_id, follower_count=1)
+        change_stats(instance.user_id, following_count=1)
+        feed.schedule_author_backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    purge_follow_pages(instance)
+    change_stats(instance.author_id, follower_count=-1)
+    change_stats(instance.user_id, following_count=-1)
+    feed.remove_author_from_feed(instance.user_id, instance.author_id)
+    feed.restore_fanout(instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    purge_pages(page_path('posts:post_detail', instance.post_id))
+    if created:
+        change_stats(instance.author_id, comment_count=1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    purge_pages(page_path('posts:post_detail', instance.post_id))
+    change_stats(instance.author_id, comment_count=-1)
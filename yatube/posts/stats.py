@@ -0,0 +1,83 @@
+"""Счетчики постов, подписчиков, подписок и комментариев пользователя.
+
+Поддерживаются сигналами при создании и удалении Post, Follow и Comment,
+поэтому страницы профиля и поста не выполняют COUNT(*) при отрисовке.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import BooleanField, Exists, F, OuterRef, Value
+
+from .models import Comment, Follow, Post, UserStats
+
+
+def count_stats(user_id):
+    """Считает счетчики пользователя заново по исходным таблицам."""
+    return {
+        'post_count': Post.objects.filter(author_id=user_id).count(),
+        'follower_count': Follow.objects.filter(author_id=user_id).count(),
+        'following_count': Follow.objects.filter(user_id=user_id).count(),
+        'comment_count': Comment.objects.filter(author_id=user_id).count(),
+    }
+
+
+def reconcile_stats(user_id):
+    """Перезаписывает счетчики пользователя точными значениями."""
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id, defaults=count_stats(user_id)
+    )
+    return stats
+
+
+def change_stats(user_id, **deltas):
+    """Атомарно сдвигает счетчики пользователя на deltas."""
+    if user_id is None:
+        return
+    with transaction.atomic():
+        updated = UserStats.objects.filter(user_id=user_id).update(**{
+            field: F(field) + delta for field, delta in deltas.items()
+        })
+        if not updated and all(delta > 0 for delta in deltas.values()):
+            reconcile_stats(user_id)
+
+
+def change_stats_many(field, deltas):
+    """change_stats для многих пользователей сразу, deltas — {user_id:
+    сдвиг field}: один UPDATE на каждое значение сдвига.
+    """
+    existing = set(UserStats.objects.filter(
+        user_id__in=deltas
+    ).values_list('user_id', flat=True))
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if user_id in existing:
+            by_delta[delta].append(user_id)
+        elif delta > 0:
+            reconcile_stats(user_id)
+    for delta, user_ids in by_delta.items():
+        UserStats.objects.filter(user_id__in=user_ids).update(
+            **{field: F(field) + delta}
+        )
+
+
+def get_user_stats(user):
+    """Счетчики пользователя; строка создается, если ее еще нет."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        user.stats = reconcile_stats(user.pk)
+        return user.stats
+
+
+def with_profile_stats(users, viewer):
+    """users вместе со счетчиками и флагом is_following — подписан ли на
+    пользователя viewer — в одном запросе.
+    """
+    users = users.select_related('stats')
+    if not viewer.is_authenticated:
+        return users.annotate(
+            is_following=Value(False, output_field=BooleanField())
+        )
+    return users.annotate(is_following=Exists(Follow.objects.filter(
+        author_id=OuterRef('pk'), user_id=viewer.pk
+    )))
@@ -0,0 +1,15 @@
+from django import template
+
+from posts.cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts, profile_flag=False, group_list_flag=False):
+    """HTML всех карточек страницы за один проход, см. posts.cards.
+
+    {% post_cards page_obj group_list_flag=True as cards %}
+    {% for card in cards %}{{ card }}{% endfor %}
+    """
+    return render_cards(posts, profile_flag, group_list_flag)
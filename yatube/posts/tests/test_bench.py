@@ -0,0 +1,35 @@
+from django.test import TestCase
+
+from posts.bench import VIEWS, compare_reports, percentile, run_benchmarks
+from posts.seeding import seed_dataset
+
+
+class BenchmarkTests(TestCase):
+    def test_report_covers_views_and_depths(self):
+        '''Замеры есть для каждого представления, ленты — на глубине
+        номером страницы и курсором.
+        '''
+        seed_dataset(users=8, groups=2, posts=60, comments=30, follows=20)
+        results = run_benchmarks(repeat=3, depths=(1, 2))
+        self.assertEqual({result['view'] for result in results}, set(VIEWS))
+        self.assertIn(
+            ('index', 'cursor', 2),
+            {(r['view'], r['mode'], r['depth']) for r in results}
+        )
+        for result in results:
+            with self.subTest(view=result['view'], mode=result['mode']):
+                self.assertIn(result['status'], (200, 302))
+                self.assertGreater(result['queries'], 0)
+                self.assertLessEqual(
+                    result['latency_ms']['p50'], result['latency_ms']['max']
+                )
+        report = {'results': results}
+        rows = compare_reports(report, report)
+        self.assertEqual(len(rows), len(results))
+
+    def test_percentile(self):
+        '''Перцентиль по ближайшему рангу'''
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([5], 90), 5)
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from posts.cache import get_or_compute
+
+
+@override_settings(FEED_CACHE_EARLY_BETA=0)
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self, value='свежее', pause=0):
+        def inner():
+            self.calls += 1
+            time.sleep(pause)
+            return value
+        return inner
+
+    def expire(self, key):
+        '''Сдвигает срок жизни записи в прошлое, оставляя ее в кэше'''
+        value, _, delta = cache.get(key)
+        cache.set(key, (value, time.time() - 1, delta))
+
+    def test_fresh_value_is_not_recomputed(self):
+        '''Пока запись свежая, функция пересчета не вызывается'''
+        get_or_compute('key', self.compute('старое'), 60)
+        value = get_or_compute('key', self.compute(), 60)
+        self.assertEqual(value, 'старое')
+        self.assertEqual(self.calls, 1)
+
+    def test_expired_value_is_recomputed_by_lock_holder(self):
+        '''Истекшую запись пересчитывает тот, кто взял блокировку'''
+        get_or_compute('key', self.compute('старое'), 60)
+        self.expire('key')
+        self.assertEqual(get_or_compute('key', self.compute(), 60), 'свежее')
+
+    def test_stale_value_is_served_while_locked(self):
+        '''Пока другой процесс держит блокировку, отдается старое значение'''
+        get_or_compute('key', self.compute('старое'), 60)
+        self.expire('key')
+        cache.add('key:lock', 1)
+        self.assertEqual(get_or_compute('key', self.compute(), 60), 'старое')
+        self.assertEqual(self.calls, 1)
+
+    def test_concurrent_misses_compute_once(self):
+        '''Одновременные промахи вызывают только один пересчет'''
+        results = []
+        workers = [
+            threading.Thread(target=lambda: results.append(
+                get_or_compute('key', self.compute(pause=0.2), 60)
+            ))
+            for _ in range(5)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(results, ['свежее'] * 5)
+        self.assertEqual(self.calls, 1)
+
+    def test_new_key_waits_about_usual_compute_time(self):
+        '''У нового ключа без старого значения чужой пересчет ждут
+        не дольше двух его обычных длительностей, затем считают сами
+        '''
+        cache.set('delta', 0.1)
+        cache.add('key:lock', 1)
+        started = time.time()
+        value = get_or_compute(
+            'key', self.compute(), 60, delta_key='delta'
+        )
+        self.assertEqual(value, 'свежее')
+        self.assertLess(time.time() - started, 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_compute_time_is_shared_between_versions(self):
+        '''Длительность пересчета запоминается под delta_key'''
+        get_or_compute(
+            'key:1', self.compute(pause=0.05), 60, delta_key='delta'
+        )
+        self.assertGreaterEqual(cache.get('delta'), 0.05)
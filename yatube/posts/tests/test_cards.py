@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.cards import render_cards
+from posts.models import Group, Post, User
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        '''Создаем автора, группу и два поста'''
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=cls.author, text='Пост без группы')
+        Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост в группе'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def posts(self):
+        return Post.objects.select_related('author', 'group')
+
+    def test_cards_contain_links_and_separators(self):
+        '''Карточки содержат ссылки на профиль, пост и группу'''
+        cards = render_cards(self.posts())
+        self.assertEqual(len(cards), 2)
+        html = ''.join(cards)
+        for post in self.posts():
+            self.assertIn(
+                reverse('posts:post_detail', args=(post.pk,)), html
+            )
+        self.assertIn(reverse('posts:profile', args=('author',)), html)
+        self.assertIn(
+            reverse('posts:group_list', args=(self.group.slug,)), html
+        )
+        self.assertNotIn(
+            'все посты пользователя', ''.join(render_cards(self.posts(), True))
+        )
+
+    def test_cached_cards_follow_post_and_group_changes(self):
+        '''Кэш карточки сбрасывается правкой поста и названия группы'''
+        render_cards(self.posts())
+        post = Post.objects.get(group=self.group)
+        post.text = 'Измененный пост'
+        post.save()
+        self.assertIn('Измененный пост', ''.join(render_cards(self.posts())))
+        Group.objects.filter(pk=self.group.pk).update(title='Новое название')
+        self.assertIn('Новое название', ''.join(render_cards(self.posts())))
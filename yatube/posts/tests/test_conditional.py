@@ -0,0 +1,146 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        '''Создаем автора, группу, пост и комментарий'''
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text='Комментарий'
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(cls.group.slug,)),
+            reverse('posts:profile', args=(cls.author.username,)),
+            reverse('posts:post_detail', args=(cls.post.id,)),
+        )
+
+    def revalidate(self, url, response, client=None):
+        return (client or self.client).get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+
+    def test_unchanged_pages_return_not_modified(self):
+        '''Повторный запрос с валидаторами без изменений — 304'''
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('ETag', response)
+                self.assertIn('Last-Modified', response)
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 304
+                )
+
+    def test_changes_invalidate_validators(self):
+        '''Правка поста и новый комментарий меняют ETag'''
+        responses = {url: self.client.get(url) for url in self.urls}
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Измененный пост'
+        post.save()
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 200
+                )
+        url = reverse('posts:post_detail', args=(self.post.id,))
+        response = self.client.get(url)
+        Comment.objects.create(post=post, author=self.author, text='Еще')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_validators_depend_on_user(self):
+        '''Другой пользователь не получает 304 на чужую страницу'''
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        author_client = Client()
+        author_client.force_login(self.author)
+        self.assertEqual(
+            self.revalidate(url, response, author_client).status_code, 200
+        )
+
+    def test_new_csrf_secret_invalidates_validators(self):
+        '''После смены CSRF-секрета (новый вход) страница с формами
+        отдается заново, а не из кэша браузера
+        '''
+        client = Client()
+        client.force_login(self.author)
+        for url in self.urls:
+            with self.subTest(url=url):
+                client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 64
+                response = client.get(url)
+                self.assertEqual(
+                    self.revalidate(url, response, client).status_code, 304
+                )
+                client.cookies[settings.CSRF_COOKIE_NAME] = 'b' * 64
+                self.assertEqual(
+                    self.revalidate(url, response, client).status_code, 200
+                )
+
+    def test_feed_revalidation_does_not_read_posts(self):
+        '''304 для лент отдается без запросов к таблице постов'''
+        author_client = Client()
+        author_client.force_login(self.author)
+        for url in self.urls[:3]:
+            with self.subTest(url=url):
+                response = author_client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    revalidated = self.revalidate(url, response, author_client)
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertFalse(any(
+                    'posts_post' in query['sql'] for query in queries
+                ))
+
+    def test_deleted_post_moves_last_modified(self):
+        '''Удаление поста сдвигает Last-Modified лент: клиент, который
+        присылает только If-Modified-Since, не получает 304.
+        '''
+        responses = {url: self.client.get(url) for url in self.urls[:3]}
+        later = time.time() + 5
+        with mock.patch('posts.cache.time.time', return_value=later):
+            Post.objects.get(pk=self.post.pk).delete()
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                ).status_code, 200)
+
+    def test_follow_changes_profile_validators(self):
+        '''Подписка и отписка меняют ETag профиля: кнопка и счетчики
+        подписчиков не остаются старыми.
+        '''
+        url = reverse('posts:profile', args=(self.author.username,))
+        reader = User.objects.create_user(username='reader')
+        reader_client = Client()
+        reader_client.force_login(reader)
+        response = reader_client.get(url)
+        reader_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        followed = self.revalidate(url, response, reader_client)
+        self.assertEqual(followed.status_code, 200)
+        self.assertNotEqual(followed['ETag'], response['ETag'])
+        self.assertTrue(followed.context['following'])
+        Follow.objects.filter(user=reader, author=self.author).delete()
+        self.assertEqual(
+            self.revalidate(url, followed, reader_client).status_code, 200
+        )
@@ -0,0 +1,220 @@
+from io import StringIO
+
+from django.contrib import admin, messages
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.models import Job
+from jobs.queue import run_pending
+from posts.deletion import (
+    delete_user, get_deletion_progress, schedule_user_deletion
+)
+from posts.models import (
+    Comment, FeedItem, Follow, Group, Post, User, UserStats
+)
+from posts.search import search_posts
+from posts.stats import count_stats
+
+
+class DeletionTests(TestCase):
+    def setUp(self):
+        '''Автор с постами и комментариями, читатель, подписанный на
+        автора, и пользователь, на которого подписан автор
+        '''
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.other)
+        run_pending(10)
+        self.posts = [
+            Post.objects.create(
+                author=self.author, group=self.group, text=f'Кошки {number}'
+            )
+            for number in range(5)
+        ]
+        self.other_post = Post.objects.create(
+            author=self.other, text='Чужой пост'
+        )
+        for post in self.posts[:3]:
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий читателя'
+            )
+        Comment.objects.create(
+            post=self.other_post, author=self.author, text='Комментарий'
+        )
+
+    def assert_stats_consistent(self, *users):
+        for user in users:
+            stats = UserStats.objects.get(user=user)
+            self.assertEqual(
+                {field: getattr(stats, field) for field in count_stats(
+                    user.pk
+                )},
+                count_stats(user.pk),
+            )
+
+    def test_delete_user_removes_everything_in_batches(self):
+        '''Удаление пачками убирает записи пользователя, чужие
+        комментарии к его постам, ленты и поиск, а счетчики остальных
+        остаются верными
+        '''
+        stages = []
+        deleted = delete_user(
+            self.author.pk, batch_size=2,
+            progress=lambda stage, counts: stages.append(stage),
+        )
+        self.assertEqual(deleted['posts'], 5)
+        self.assertEqual(deleted['comments'], 4)
+        self.assertEqual(deleted['follows'], 2)
+        self.assertEqual(deleted['users'], 1)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Post.objects.all()), [self.other_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(FeedItem.objects.exists())
+        self.assertFalse(search_posts(Post.objects.all(), 'кошки').exists())
+        self.assert_stats_consistent(self.reader, self.other)
+        self.assertEqual(
+            stages, ['comments', 'posts', 'posts', 'posts', 'posts',
+                     'follows', 'user']
+        )
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_deletion_restores_fanout_of_followed_authors(self):
+        '''Автор, вернувшийся в лимит раскладки после удаления
+        подписчика, снова раскладывается по лентам
+        '''
+        Follow.objects.create(user=self.reader, author=self.other)
+        post = Post.objects.create(author=self.other, text='Новый пост')
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+        delete_user(self.author.pk)
+        run_pending(10)
+        self.assertTrue(
+            FeedItem.objects.filter(user=self.reader, post=post).exists()
+        )
+
+    def test_deleted_posts_disappear_from_cached_pages(self):
+        '''После удаления страницы лент и профилей не отдаются из кэша'''
+        group_url = reverse('posts:group_list', args=[self.group.slug])
+        self.assertContains(self.client.get(group_url), 'Кошки 1')
+        delete_user(self.author.pk)
+        self.assertNotContains(self.client.get(group_url), 'Кошки 1')
+        self.assertNotContains(
+            self.client.get(reverse('posts:index')), 'Кошки 1'
+        )
+
+    @override_settings(DELETION_ASYNC_THRESHOLD=5)
+    def test_large_user_is_deleted_by_worker(self):
+        '''Пользователя с большим числом записей удаляет воркер; ход
+        удаления хранится в строке задачи
+        '''
+        self.assertTrue(schedule_user_deletion(self.author))
+        self.assertEqual(Job.objects.filter(status=Job.PENDING).count(), 1)
+        self.assertFalse(User.objects.get(pk=self.author.pk).is_active)
+        self.assertEqual(
+            get_deletion_progress(self.author.pk)['status'], 'pending'
+        )
+        call_command('run_jobs', processes=0, once=True, stdout=StringIO())
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        progress = get_deletion_progress(self.author.pk)
+        self.assertEqual(progress['status'], 'done')
+        self.assertEqual(progress['deleted']['posts'], 5)
+
+    def test_small_user_is_deleted_at_once(self):
+        '''Пользователя с немногими записями удаляют сразу'''
+        self.assertFalse(schedule_user_deletion(self.other))
+        self.assertFalse(Job.objects.filter(status=Job.PENDING).exists())
+        self.assertFalse(User.objects.filter(pk=self.other.pk).exists())
+        self.assert_stats_consistent(self.author)
+
+    @override_settings(DELETION_ASYNC_THRESHOLD=5)
+    def test_admin_deletes_users_without_collector(self):
+        '''Админка показывает сводку по счетчикам и удаляет пользователей
+        через очередь, а не каскадом
+        '''
+        admin_user = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin_user)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        response = self.client.get(url)
+        self.assertContains(response, 'Посты — 5')
+        response = self.client.post(url, {'post': 'yes'}, follow=True)
+        self.assertEqual(
+            [(message.level, str(message))
+             for message in response.context['messages']],
+            [(messages.WARNING, 'Удаление поставлено в очередь: author')],
+        )
+        self.assertEqual(Job.objects.filter(status=Job.PENDING).count(), 1)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        self.client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'delete_selected', 'post': 'yes',
+            '_selected_action': [self.other.pk],
+        })
+        self.assertFalse(User.objects.filter(pk=self.other.pk).exists())
+        self.assertEqual(Job.objects.filter(status=Job.PENDING).count(), 1)
+
+    def test_admin_needs_delete_permission_on_user_records(self):
+        '''Без права удалять посты, комментарии и подписки админка не
+        удаляет пользователя с такими записями
+        '''
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff.user_permissions.add(*Permission.objects.filter(
+            codename__in=('view_user', 'change_user', 'delete_user')
+        ))
+        request = RequestFactory().get('/')
+        request.user = staff
+        _, _, perms_needed, _ = admin.site._registry[User].get_deleted_objects(
+            [self.author], request
+        )
+        self.assertEqual(perms_needed, {'Пост', 'Комментарий', 'Подписка'})
+
+    def test_post_delete_view_keeps_stats(self):
+        '''Удаление поста автором убирает комментарии и записи лент и
+        уменьшает счетчики
+        '''
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('posts:post_delete', args=[self.posts[0].pk])
+        )
+        self.assertFalse(Post.objects.filter(pk=self.posts[0].pk).exists())
+        self.assertFalse(
+            FeedItem.objects.filter(post_id=self.posts[0].pk).exists()
+        )
+        self.assert_stats_consistent(self.author, self.reader)
+
+    @override_settings(DELETION_BATCH_SIZE=2, QUERY_BUDGET_STRICT=True)
+    def test_post_with_many_comments_is_deleted_by_worker(self):
+        '''Пост с комментариями больше чем на одну пачку удаляет воркер,
+        а запрос укладывается в бюджет
+        '''
+        post = self.posts[0]
+        for number in range(3):
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Ответ {number}'
+            )
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('posts:post_delete', args=[post.pk])
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Post.objects.filter(pk=post.pk).exists())
+        run_pending(10)
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+        self.assertFalse(Comment.objects.filter(post_id=post.pk).exists())
+        self.assert_stats_consistent(self.author, self.reader)
+
+    def test_command_deletes_user(self):
+        '''Команда delete_user удаляет пользователя и печатает ход'''
+        stdout = StringIO()
+        call_command('delete_user', 'author', stdout=stdout)
+        self.assertIn('posts:', stdout.getvalue())
+        self.assertFalse(User.objects.filter(username='author').exists())
@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from jobs.queue import run_pending
+from posts.feed import MATERIALIZED_FEED_KEY, get_follow_feed
+from posts.models import FeedItem, Follow, Post, User
+
+
+def feed_posts(user):
+    posts, _ = get_follow_feed(user)
+    return posts
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        '''Создаем автора с постом и подписчика'''
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Пост до подписки',
+        )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        run_pending(10)
+
+    def test_follow_adds_existing_posts_to_feed(self):
+        '''После подписки старые посты автора попадают в ленту'''
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.follower, post=self.old_post
+        ).exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        '''Новый пост раскладывается в ленты подписчиков'''
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertIn(post, feed_posts(self.follower))
+        self.assertNotIn(post, feed_posts(self.author))
+
+    def test_unfollow_clears_feed(self):
+        '''После отписки посты автора исчезают из ленты'''
+        Follow.objects.filter(user=self.follower, author=self.author).delete()
+        self.assertFalse(
+            FeedItem.objects.filter(user=self.follower).exists()
+        )
+        self.assertFalse(feed_posts(self.follower).exists())
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_big_author_is_read_on_fan_in(self):
+        '''Посты авторов с большим числом подписчиков не раскладываются,
+        но попадают в ленту при чтении.
+        '''
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+        self.assertIn(post, feed_posts(self.follower))
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_posts_return_to_feed_when_author_is_under_limit(self):
+        '''Посты, опубликованные, пока у автора было слишком много
+        подписчиков, попадают в ленты, когда он снова укладывается в лимит
+        '''
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+        Follow.objects.filter(user=reader).delete()
+        run_pending(10)
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.follower, post=post
+        ).exists())
+        self.assertIn(post, feed_posts(self.follower))
+
+    @override_settings(FEED_BACKFILL_LIMIT=1)
+    def test_new_follow_is_read_on_fan_in_until_backfilled(self):
+        '''Посты нового автора видны в ленте сразу, а фоновая задача
+        дописывает в нее только последние FEED_BACKFILL_LIMIT постов
+        '''
+        reader = User.objects.create_user(username='reader')
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        Follow.objects.create(user=reader, author=self.author)
+        self.assertFalse(FeedItem.objects.filter(user=reader).exists())
+        self.assertIn(self.old_post, feed_posts(reader))
+        run_pending(10)
+        self.assertEqual(
+            list(FeedItem.objects.filter(user=reader).values_list(
+                'post_id', flat=True
+            )),
+            [new_post.pk],
+        )
+        _, key = get_follow_feed(reader)
+        self.assertEqual(key, MATERIALIZED_FEED_KEY)
+
+    def test_backfill_command_rebuilds_feed(self):
+        '''Команда backfill_feed восстанавливает потерянные записи ленты'''
+        FeedItem.objects.all().delete()
+        call_command('backfill_feed', stdout=StringIO())
+        self.assertIn(self.old_post, feed_posts(self.follower))
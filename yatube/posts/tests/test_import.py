@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from jobs.models import Job
+from posts.models import (
+    Comment, FeedItem, Follow, Group, Post, User, UserStats
+)
+from posts.search import search_posts
+from posts.thumbnails import generate_thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        '''Создаем автора, читателя и группу, файлы импорта — во
+        временном каталоге
+        '''
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.files = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        with open(os.path.join(cls.files, 'cat.gif'), 'wb') as file:
+            file.write(SMALL_GIF)
+        cls.posts = cls.write('posts.ndjson', '\n'.join([
+            json.dumps({
+                'id': 1, 'author': 'author', 'group': 'group',
+                'text': 'Старый пост про кошек',
+                'pub_date': '2015-05-01T10:00:00+00:00',
+                'image': 'cat.gif',
+            }),
+            json.dumps({
+                'id': 2, 'author': 'author', 'text': 'Второй пост',
+                'pub_date': '2015-05-02T10:00:00',
+            }),
+            json.dumps({
+                'id': 2, 'author': 'author', 'text': 'Повтор в файле',
+                'pub_date': '2015-05-02T10:00:00',
+            }),
+            json.dumps({
+                'id': 3, 'author': 'stranger', 'text': 'Чужой пост',
+                'pub_date': '2015-05-03T10:00:00',
+            }),
+            '{битая строка',
+        ]))
+        cls.comments = cls.write('comments.csv', (
+            'id,post,author,text,pub_date\n'
+            '10,1,reader,Комментарий,2015-05-04T10:00:00\n'
+            '11,99,reader,К несуществующему посту,2015-05-04T10:00:00\n'
+            '12,2,reader,,2015-05-04T10:00:00\n'
+        ))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.files, ignore_errors=True)
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def write(cls, name, content):
+        path = os.path.join(cls.files, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def import_files(self, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'import_posts', posts=[self.posts], comments=[self.comments],
+            images_dir=self.files, batch_size=2, stdout=stdout,
+            stderr=stderr, **options
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_creates_posts_and_comments(self):
+        '''Импорт сохраняет даты, группы, картинки и комментарии, а также
+        счетчики, поиск, ленты и очередь миниатюр.
+        '''
+        stdout, stderr = self.import_files()
+        self.assertIn('создано 2', stdout)
+        self.assertIn('создано 1', stdout)
+        self.assertIn('нет пользователя stranger', stderr)
+        self.assertIn('нет поста 99', stderr)
+        self.assertIn('нет полей: text', stderr)
+        self.assertIn('строка не разбирается', stderr)
+        post = Post.objects.get(text='Старый пост про кошек')
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(post.group, self.group)
+        self.assertTrue(post.image.name.startswith('posts/cat'))
+        self.assertEqual(post.comments.get().author, self.reader)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).post_count, 2
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).comment_count, 1
+        )
+        self.assertIn(post, search_posts(Post.objects.all(), 'кошек'))
+        self.assertEqual(FeedItem.objects.filter(user=self.reader).count(), 2)
+        self.assertEqual(
+            Job.objects.filter(name=generate_thumbnails.job_name).count(), 1
+        )
+
+    def test_import_is_idempotent(self):
+        '''Повторный импорт пропускает уже загруженные записи
+        (и повторы внутри файла).
+        '''
+        self.import_files()
+        stdout, _ = self.import_files()
+        self.assertIn('создано 0, пропущено повторов 3', stdout)
+        self.assertIn('создано 0, пропущено повторов 1', stdout)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_create_missing_authors(self):
+        '''--create-missing создает неизвестных авторов'''
+        self.import_files(create_missing=True)
+        self.assertTrue(
+            Post.objects.filter(author__username='stranger').exists()
+        )
+
+    def test_command_requires_files(self):
+        '''Без файлов команда завершается ошибкой'''
+        with self.assertRaises(CommandError):
+            call_command('import_posts', stdout=StringIO())
@@ -0,0 +1,67 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from jobs.queue import run_pending
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class FeedQueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        '''Создаем автора, группу, посты, комментарий и подписку'''
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        run_pending(10)
+        for number in range(3):
+            cls.post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}'
+            )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def test_feed_queries_are_sorted_by_index(self):
+        '''Запросы лент и комментариев сортируются по индексу, а не во
+        временном B-дереве.
+        '''
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?cursor=broken',
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', args=(self.post.id,)),
+        )
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.reader_client.get(url)
+            ordered = [
+                query['sql'] for query in queries
+                if 'ORDER BY' in query['sql']
+                and ('FROM "posts_post"' in query['sql']
+                     or 'FROM "posts_comment"' in query['sql'])
+            ]
+            self.assertTrue(ordered, url)
+            for sql in ordered:
+                with self.subTest(url=url, sql=sql):
+                    plan = self.query_plan(sql)
+                    self.assertNotIn('TEMP B-TREE', plan)
+                    self.assertIn('INDEX', plan)
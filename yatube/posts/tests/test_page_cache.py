@@ -0,0 +1,122 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        '''Создаем автора, читателя, группу и пост'''
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+        cls.index_url = reverse('posts:index')
+        cls.group_url = reverse('posts:group_list', args=(cls.group.slug,))
+        cls.profile_url = reverse('posts:profile', args=('author',))
+        cls.detail_url = reverse('posts:post_detail', args=(cls.post.id,))
+
+    def setUp(self):
+        cache.clear()
+
+    def assertCached(self, url, cached=True):
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'] == 'hit', cached, url)
+        if cached:
+            self.assertEqual(len(queries), 0)
+        return response
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        '''Повторный анонимный запрос отдается из кэша без SQL'''
+        for url in (self.index_url, self.group_url, self.profile_url,
+                    self.detail_url, self.index_url + '?page=1'):
+            with self.subTest(url=url):
+                self.assertCached(url)
+
+    def test_authenticated_users_bypass_cache(self):
+        '''Авторизованный пользователь всегда получает свежую страницу'''
+        self.client.force_login(self.reader)
+        self.client.get(self.index_url)
+        response = self.client.get(self.index_url)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertEqual(response.context['page_obj'][0], self.post)
+
+    def test_post_change_purges_its_pages(self):
+        '''Правка поста сбрасывает страницы ленты, группы, профиля и поста
+        вместе с их вариантами строки запроса.
+        '''
+        urls = (self.index_url, self.index_url + '?page=1', self.group_url,
+                self.profile_url, self.detail_url)
+        for url in urls:
+            self.client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Измененный пост'
+        post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'miss')
+                self.assertContains(response, 'Измененный пост')
+
+    def test_comment_follow_and_group_changes_purge_pages(self):
+        '''Комментарий, подписка и правка группы сбрасывают свои страницы,
+        не трогая остальные.
+        '''
+        changes = (
+            (
+                lambda: Comment.objects.create(
+                    post=self.post, author=self.reader, text='Комментарий'
+                ),
+                self.detail_url, self.index_url
+            ),
+            (
+                lambda: Follow.objects.create(
+                    user=self.reader, author=self.author
+                ),
+                self.profile_url, self.group_url
+            ),
+            (
+                lambda: Group.objects.filter(pk=self.group.pk).first().save(),
+                self.group_url, None
+            ),
+        )
+        for change, purged_url, kept_url in changes:
+            with self.subTest(purged_url=purged_url):
+                self.assertCached(purged_url)
+                if kept_url:
+                    self.assertCached(kept_url)
+                change()
+                self.assertEqual(
+                    self.client.get(purged_url)['X-Page-Cache'], 'miss'
+                )
+                if kept_url:
+                    self.assertEqual(
+                        self.client.get(kept_url)['X-Page-Cache'], 'hit'
+                    )
+
+    def test_new_post_does_not_enumerate_author_posts(self):
+        '''Новый пост не перебирает все посты автора ради сброса их
+        страниц: запись стоит O(1), а не O(постов автора).
+        '''
+        for number in range(3):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        with CaptureQueriesContext(connection) as queries:
+            post = Post.objects.create(author=self.author, text='Еще')
+            post.delete()
+        self.assertFalse(any(
+            query['sql'].startswith('SELECT "posts_post"."id" FROM')
+            for query in queries
+        ))
@@ -0,0 +1,76 @@
+from django.contrib.admin.sites import site
+from unittest import mock
+
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.search import pg_tsvector, search_posts
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        '''Создаем автора и посты с разным текстом'''
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.cats = Post.objects.create(
+            author=cls.author, text='Кошки спят. Кошки едят. Кошки играют.'
+        )
+        cls.cat_and_dog = Post.objects.create(
+            author=cls.author, text='Кошка и собака гуляют вместе'
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.author, text='Собаки лают по ночам'
+        )
+
+    def search(self, query):
+        return list(search_posts(Post.objects.all(), query))
+
+    def test_search_finds_words_by_prefix_and_ranks(self):
+        '''Находятся посты со словами запроса, релевантные — первыми'''
+        self.assertEqual(self.search('кошк'), [self.cats, self.cat_and_dog])
+        self.assertEqual(self.search('кошка собака'), [self.cat_and_dog])
+        self.assertEqual(self.search('!!!'), [])
+
+    def test_index_follows_post_changes(self):
+        '''Индекс обновляется при изменении и удалении поста'''
+        post = Post.objects.get(pk=self.dogs.pk)
+        post.text = 'Хомяки грызут морковь'
+        post.save()
+        self.assertEqual(self.search('хомяки'), [post])
+        self.assertEqual(self.search('лают'), [])
+        post.delete()
+        self.assertEqual(self.search('хомяки'), [])
+
+    def test_postgres_search_uses_indexed_expression(self):
+        '''На PostgreSQL условие поиска совпадает с выражением индекса'''
+        with mock.patch('posts.search.connection') as connection:
+            connection.vendor = 'postgresql'
+            queryset = search_posts(Post.objects.all(), 'кошки')
+        self.assertIn(
+            f"{pg_tsvector('posts_post.text')} @@ "
+            "plainto_tsquery('russian', ",
+            str(queryset.query),
+        )
+
+    def test_operators_in_query_do_not_break_search(self):
+        '''Кавычки и операторы FTS5 во вводе не ломают запрос'''
+        self.assertEqual(self.search('"собаки (лают* -'), [self.dogs])
+
+    def test_search_page_shows_results(self):
+        '''Страница /search/ показывает найденные посты'''
+        response = self.client.get(reverse('posts:search'), {'q': 'собак'})
+        self.assertEqual(
+            set(response.context['page_obj']), {self.cat_and_dog, self.dogs}
+        )
+        self.assertEqual(response.context['query'], 'собак')
+
+    def test_admin_search_uses_index(self):
+        '''Поиск в админке идет по тому же индексу'''
+        model_admin = site._registry[Post]
+        queryset, use_distinct = model_admin.get_search_results(
+            RequestFactory().get('/'), Post.objects.all(), 'лают'
+        )
+        self.assertEqual(list(queryset), [self.dogs])
+        self.assertFalse(use_distinct)
@@ -0,0 +1,80 @@
+from io import StringIO
+from statistics import median
+
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from posts.models import FeedItem, Follow, Post, User
+from posts.search import search_posts
+from posts.seeding import seed_dataset
+from posts.stats import count_stats
+
+
+class SeedDatasetTests(TestCase):
+    def test_dataset_is_consistent_and_deterministic(self):
+        '''Набор данных одинаков при одном seed и любом числе процессов,
+        производные данные (счетчики, поиск, ленты) досчитаны.
+        '''
+        dataset = seed_dataset(
+            users=10, groups=2, posts=50, comments=80, follows=15, seed=7
+        )
+        self.assertEqual(dataset, {
+            'users': 10, 'groups': 2, 'posts': 50, 'comments': 80,
+            'follows': 15,
+        })
+        texts = list(Post.objects.order_by('pk').values_list('text'))
+        for user in User.objects.all():
+            self.assertEqual(
+                count_stats(user.pk),
+                {
+                    field: getattr(user.stats, field)
+                    for field in count_stats(user.pk)
+                }
+            )
+        post = Post.objects.first()
+        self.assertIn(
+            post, search_posts(Post.objects.all(), post.text.split()[0])
+        )
+        follow = Follow.objects.first()
+        self.assertEqual(
+            FeedItem.objects.filter(user=follow.user).count(),
+            Post.objects.filter(
+                author__following__user=follow.user
+            ).count()
+        )
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        seed_dataset(
+            users=10, groups=2, posts=50, comments=80, follows=15, seed=7,
+            prefix='again', workers=2
+        )
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text')), texts
+        )
+
+    def test_popularity_follows_power_law(self):
+        '''Немногие авторы собирают большую часть подписчиков'''
+        seed_dataset(users=60, groups=0, posts=0, comments=0, follows=400)
+        followers = sorted(Follow.objects.values('author_id').annotate(
+            total=Count('pk')
+        ).values_list('total', flat=True), reverse=True)
+        self.assertGreater(followers[0], 5 * median(followers))
+        self.assertGreater(sum(followers[:6]), sum(followers) / 3)
+
+
+class SeedCommandTests(TestCase):
+    def test_seed_command(self):
+        '''Команда не запускается при DEBUG = False без --force
+        и не повторяет занятый префикс.
+        '''
+        options = {
+            'users': 5, 'groups': 1, 'posts': 10, 'comments': 5,
+            'follows': 5, 'workers': 1, 'stdout': StringIO(),
+        }
+        with self.assertRaises(CommandError):
+            call_command('seed', **options)
+        call_command('seed', force=True, **options)
+        self.assertEqual(Post.objects.count(), 10)
+        with self.assertRaises(CommandError):
+            call_command('seed', force=True, **options)
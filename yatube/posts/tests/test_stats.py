@@ -0,0 +1,104 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, User, UserStats
+
+
+class UserStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        '''Создаем автора, читателя, пост, комментарий и подписку'''
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def get_stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_counters_follow_created_objects(self):
+        '''Счетчики увеличиваются при создании постов, подписок
+        и комментариев.
+        '''
+        author_stats = self.get_stats(self.author)
+        reader_stats = self.get_stats(self.reader)
+        self.assertEqual(author_stats.post_count, 1)
+        self.assertEqual(author_stats.follower_count, 1)
+        self.assertEqual(reader_stats.following_count, 1)
+        self.assertEqual(reader_stats.comment_count, 1)
+
+    def test_counters_follow_deleted_objects(self):
+        '''Удаление поста уменьшает счетчики постов и комментариев,
+        отписка — счетчики подписок.
+        '''
+        Post.objects.get(pk=self.post.pk).delete()
+        Follow.objects.all().delete()
+        author_stats = self.get_stats(self.author)
+        reader_stats = self.get_stats(self.reader)
+        self.assertEqual(author_stats.post_count, 0)
+        self.assertEqual(author_stats.follower_count, 0)
+        self.assertEqual(reader_stats.following_count, 0)
+        self.assertEqual(reader_stats.comment_count, 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        '''Команда reconcile_stats исправляет разошедшиеся счетчики'''
+        UserStats.objects.filter(user=self.author).update(post_count=42)
+        UserStats.objects.filter(user=self.reader).delete()
+        call_command('reconcile_stats', stdout=StringIO())
+        self.assertEqual(self.get_stats(self.author).post_count, 1)
+        self.assertEqual(self.get_stats(self.reader).comment_count, 1)
+
+    def test_pages_render_counters_without_count_queries(self):
+        '''Профиль и страница поста выводят счетчики без COUNT(*)
+        (кроме подсчета комментариев поста для ETag).
+        '''
+        pages = (
+            (
+                reverse('posts:profile', args=(self.author.username,)),
+                'Всего постов: 1',
+                0
+            ),
+            (
+                reverse('posts:post_detail', args=(self.post.id,)),
+                '<span >1</span>',
+                1
+            ),
+        )
+        for url, counter_html, paginator_counts in pages:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertContains(response, counter_html)
+                self.assertEqual(
+                    sum('COUNT(' in query['sql'] for query in queries),
+                    paginator_counts
+                )
+
+    def test_profile_page_query_count(self):
+        '''Профиль выполняет фиксированное число запросов: автор со
+        счетчиками и флагом подписки (один запрос на валидаторы и view),
+        страница постов (и сессия с пользователем для вошедшего).
+        '''
+        url = reverse('posts:profile', args=(self.author.username,))
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        for client, queries, following in (
+            (self.client, 2, False),
+            (reader_client, 4, True),
+        ):
+            with self.subTest(queries=queries):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    response = client.get(url)
+                self.assertEqual(response.context['following'], following)
+                self.assertContains(response, 'Подписчиков: 1')
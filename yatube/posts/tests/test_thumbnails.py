@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.thumbnails import generate_thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user')
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+
+    def uploaded(self):
+        return SimpleUploadedFile(
+            name='small.gif', content=SMALL_GIF, content_type='image/gif'
+        )
+
+    def test_create_schedules_thumbnails(self):
+        '''Создание поста с картинкой ставит нарезку миниатюр в очередь'''
+        with mock.patch('posts.views.schedule_thumbnails') as schedule:
+            self.user_client.post(
+                reverse('posts:post_create'),
+                data={'text': 'Пост с картинкой', 'image': self.uploaded()},
+            )
+        schedule.assert_called_once_with(Post.objects.get())
+
+    def test_generated_thumbnail_is_rendered(self):
+        '''Готовая миниатюра хранится в посте и выводится в шаблоне'''
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=self.uploaded()
+        )
+        generate_thumbnails(post.pk)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_url)
+        self.assertEqual(
+            (post.thumbnail_width, post.thumbnail_height), (678, 339)
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertContains(response, post.thumbnail_url)
+
+    def test_command_fills_missing_thumbnails(self):
+        '''Команда generate_thumbnails нарезает недостающие миниатюры'''
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=self.uploaded()
+        )
+        call_command('generate_thumbnails', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_url)
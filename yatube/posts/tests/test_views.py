@@ -2,11 +2,14 @@ from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.forms import PostForm
 from posts.models import Comment, Follow, Group, Post, User
+from posts.stats import reconcile_stats
 
 
 class PostViewsTests(TestCase):
@@ -53,7 +56,8 @@ class PostViewsTests(TestCase):
         )
 
     def setUp(self):
-        '''Создаем авторизованный клиент'''
+        '''Создаем авторизованный клиент и очищаем кэш страниц'''
+        cache.clear()
         self.user_client = Client()
         self.user_client.force_login(self.user)
         self.user_follower_client = Client()
@@ -172,6 +176,31 @@ class PostViewsTests(TestCase):
             response_after_cache_cleared
         )
 
+    def test_cached_feeds_show_new_and_edited_posts(self):
+        '''Закэшированные ленты сразу показывают новый и измененный пост'''
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.user.username,)),
+        )
+        for url in urls:
+            self.client.get(url)
+        new_post = Post.objects.create(
+            author=self.user, group=self.group, text='Свежий пост'
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежий пост')
+        self.user_client.post(
+            reverse('posts:post_edit', args=(new_post.id,)),
+            data={'text': 'Исправленный пост', 'group': self.group.id},
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.client.get(url), 'Исправленный пост'
+                )
+
     def test_followers_follow_index_contains_following_posts(self):
         '''Новая записть автора появляется в ленте тех, кто на него
         подписан.
@@ -208,10 +237,6 @@ class PaginatorViewTest(TestCase):
             slug='test_slug',
             description='Тестовое описание',
         )
-        cls.follow = Follow.objects.create(
-            user=cls.user_follower,
-            author=cls.user_paginator
-        )
         posts_for_paginator_test = [
             Post(
                 author=cls.user_paginator,
@@ -220,6 +245,14 @@ class PaginatorViewTest(TestCase):
             ) for post_number in range(cls.AMOUNT_OF_POSTS)
         ]
         Post.objects.bulk_create(posts_for_paginator_test)
+        # bulk_create не отправляет post_save: счетчики автора, по которым
+        # считаются страницы профиля, пересчитываются вручную, а подписка
+        # создается после постов и сама наполняет ленту подписчика.
+        reconcile_stats(cls.user_paginator.pk)
+        cls.follow = Follow.objects.create(
+            user=cls.user_follower,
+            author=cls.user_paginator
+        )
 
         cls.REVERSE_PAGES_NAMES_LIST_PAGINATOR = (
             ('posts:index', None),
@@ -248,3 +281,118 @@ class PaginatorViewTest(TestCase):
                             len(response.context['page_obj'].object_list),
                             amount
                         )
+
+    def test_cursor_pages_follow_and_return(self):
+        '''Страницы по курсору: «Следующая» ведет на оставшиеся посты,
+        «Предыдущая» возвращает на первую страницу, OFFSET не используется.
+        '''
+        for address, args in self.REVERSE_PAGES_NAMES_LIST_PAGINATOR:
+            with self.subTest(address=reverse(address, args=args)):
+                url = reverse(address, args=args)
+                first_page = self.user_follower_client.get(url).context[
+                    'page_obj'
+                ]
+                with CaptureQueriesContext(connection) as queries:
+                    second_page = self.user_follower_client.get(
+                        url, {'cursor': first_page.next_cursor}
+                    ).context['page_obj']
+                self.assertFalse(any(
+                    'OFFSET' in query['sql'] for query in queries
+                ))
+                self.assertEqual(
+                    len(second_page),
+                    self.AMOUNT_OF_POSTS - settings.POSTS_LIMIT
+                )
+                self.assertFalse(second_page.has_next())
+                self.assertTrue(second_page.has_previous())
+                returned_page = self.user_follower_client.get(
+                    url, {'cursor': second_page.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    list(returned_page.object_list),
+                    list(first_page.object_list)
+                )
+                self.assertFalse(returned_page.has_previous())
+
+    def test_first_page_is_read_without_count(self):
+        '''Страница без ?page= читается по курсору, без COUNT(*)'''
+        for address, args in self.REVERSE_PAGES_NAMES_LIST_PAGINATOR:
+            with self.subTest(address=reverse(address, args=args)):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    page_obj = self.user_follower_client.get(
+                        reverse(address, args=args)
+                    ).context['page_obj']
+                self.assertFalse(any(
+                    'COUNT(' in query['sql'] for query in queries
+                ))
+                self.assertEqual(len(page_obj), settings.POSTS_LIMIT)
+                self.assertTrue(page_obj.next_cursor)
+                self.assertFalse(page_obj.has_previous())
+
+    def test_broken_cursor_shows_first_page(self):
+        '''Битый курсор не ломает страницу и показывает первую страницу'''
+        response = self.user_follower_client.get(
+            reverse('posts:index'), {'cursor': 'broken'}
+        )
+        self.assertEqual(
+            len(response.context['page_obj']), settings.POSTS_LIMIT
+        )
+
+
+@override_settings(COMMENTS_LIMIT=3)
+class CommentsPageViewTest(TestCase):
+    '''Тест порционной загрузки комментариев'''
+    AMOUNT_OF_COMMENTS = 5
+
+    @classmethod
+    def setUpClass(cls):
+        '''Создаем пост с пятью комментариями'''
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commentator')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        for number in range(cls.AMOUNT_OF_COMMENTS):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_detail_shows_first_comments(self):
+        '''На странице поста первая порция комментариев и курсор дальше'''
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2']
+        )
+        self.assertTrue(response.context['comments_next_cursor'])
+        self.assertContains(response, 'Показать еще комментарии')
+
+    def test_more_comments_are_loaded_by_cursor(self):
+        '''JSON-ответ содержит оставшиеся комментарии и пустой курсор'''
+        cursor = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        ).context['comments_next_cursor']
+        response = self.client.get(
+            reverse('posts:post_comments', args=(self.post.id,)),
+            {'format': 'json', 'cursor': cursor}
+        )
+        data = response.json()
+        self.assertIsNone(data['next_cursor'])
+        self.assertIn('Комментарий 3', data['html'])
+        self.assertIn('Комментарий 4', data['html'])
+        self.assertNotIn('Комментарий 2', data['html'])
+
+    def test_html_fragment_links_next_comments(self):
+        '''HTML-фрагмент без JSON содержит ссылку на следующую порцию'''
+        url = reverse('posts:post_comments', args=(self.post.id,))
+        response = self.client.get(url)
+        cursor = response.context['next_cursor']
+        self.assertTrue(cursor)
+        self.assertContains(response, f'data-next-cursor="{cursor}"')
+        self.assertContains(response, f'{url}?cursor={cursor}')
+        response = self.client.get(url, {'cursor': cursor})
+        self.assertNotContains(response, 'data-next-cursor')
@@ -0,0 +1,54 @@
+"""Предварительная нарезка миниатюр картинок постов.
+
+Раньше {% thumbnail %} в карточке поста на каждом показе обращался к
+хранилищу sorl, а при промахе декодировал и масштабировал оригинал прямо
+в запросе. Теперь после сохранения поста все размеры из
+settings.POST_THUMBNAILS нарезает фоновая задача (jobs), а адрес и размеры
+основной миниатюры записываются в строку Post, откуда их берут шаблоны.
+"""
+from django.conf import settings
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from jobs.queue import enqueue, job
+
+from .cache import bump_post_feeds, purge_post_pages
+from .models import Post
+
+
+def reset_thumbnail(post):
+    """Сбрасывает основную миниатюру до сохранения новой картинки."""
+    post.thumbnail_url = ''
+    post.thumbnail_width = None
+    post.thumbnail_height = None
+
+
+@job
+def generate_thumbnails(post_id):
+    """Нарезает все миниатюры поста и сохраняет основную в Post."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    fields = {
+        'thumbnail_url': '',
+        'thumbnail_width': None,
+        'thumbnail_height': None,
+    }
+    if post.image:
+        thumbnails = [
+            get_thumbnail(post.image, geometry, **options)
+            for geometry, options in settings.POST_THUMBNAILS
+        ]
+        fields = {
+            'thumbnail_url': thumbnails[0].url,
+            'thumbnail_width': thumbnails[0].width,
+            'thumbnail_height': thumbnails[0].height,
+        }
+    Post.objects.filter(pk=post_id).update(updated_at=timezone.now(), **fields)
+    bump_post_feeds(post.author_id, post.group_id)
+    purge_post_pages(post, post.group_id)
+
+
+def schedule_thumbnails(post):
+    """Ставит нарезку миниатюр поста в очередь фоновых задач."""
+    enqueue(generate_thumbnails, post.pk)
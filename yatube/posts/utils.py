@@ -1,9 +1,175 @@
+import base64
+import json
+
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core.paginator import Page, Paginator
+from django.db import connection
+from django.db.models import AutoField, Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_NEXT = 'next'
+CURSOR_PREVIOUS = 'prev'
+# Поля ключа сортировки ленты: (дата публикации, id поста). Лента
+# подписок сортирует по их копиям в FeedItem, см. posts.feed.
+FEED_KEY = ('pub_date', 'pk')
+
+
+def encode_cursor(obj, direction=CURSOR_NEXT):
+    """Кодирует позицию поста или комментария (pub_date, id) для ?cursor=."""
+    payload = json.dumps(
+        [direction, obj.pub_date.isoformat(), obj.pk],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает (direction, pub_date, id) или None для битого курсора."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, pub_date, pk = json.loads(
+            base64.urlsafe_b64decode(padded.encode()).decode()
+        )
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинатор по (pub_date, id) без COUNT(*) и OFFSET.
+
+    Стоимость страницы не зависит от глубины: каждая страница —
+    это один запрос с WHERE по ключу последнего показанного поста.
+    """
+
+    def __init__(self, object_list, per_page, key=FEED_KEY):
+        self.date_field, self.id_field = key
+        super().__init__(
+            object_list.order_by(f'-{self.date_field}', f'-{self.id_field}'),
+            per_page
+        )
+
+    def _after(self, lookup, pub_date, pk):
+        return Q(**{f'{self.date_field}__{lookup}': pub_date}) | Q(**{
+            self.date_field: pub_date, f'{self.id_field}__{lookup}': pk
+        })
 
+    def cursor_page(self, object_list, has_next, has_previous):
+        """Обычный Page с next_cursor и previous_cursor вместо номера.
 
-def get_paginator_func(request, *args):
-    paginator = Paginator(*args, settings.POSTS_LIMIT)
+        Номер страницы и num_pages условные (1 или 2 и на одну больше при
+        has_next): по ним Page отвечает на has_next()/has_previous(), а
+        настоящего числа страниц keyset-пагинатор не знает.
+        """
+        number = 2 if has_previous else 1
+        self.num_pages = number + 1 if has_next else number
+        page = Page(object_list, number, self)
+        page.is_cursor = True
+        page.next_cursor = (
+            encode_cursor(object_list[-1], CURSOR_NEXT)
+            if has_next else None
+        )
+        page.previous_cursor = (
+            encode_cursor(object_list[0], CURSOR_PREVIOUS)
+            if has_previous else None
+        )
+        return page
+
+    def first_page(self):
+        posts = list(self.object_list[:self.per_page + 1])
+        return self.cursor_page(
+            posts[:self.per_page],
+            has_next=len(posts) > self.per_page,
+            has_previous=False,
+        )
+
+    def page_by_cursor(self, cursor):
+        decoded = decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            return self.first_page()
+        direction, pub_date, pk = decoded
+        if direction == CURSOR_NEXT:
+            posts = list(self.object_list.filter(
+                self._after('lt', pub_date, pk)
+            )[:self.per_page + 1])
+            if not posts:
+                return self.first_page()
+            return self.cursor_page(
+                posts[:self.per_page],
+                has_next=len(posts) > self.per_page,
+                has_previous=True,
+            )
+        posts = list(self.object_list.filter(
+            self._after('gt', pub_date, pk)
+        ).reverse()[:self.per_page + 1])
+        has_previous = len(posts) > self.per_page
+        posts = posts[:self.per_page][::-1]
+        if not posts:
+            return self.first_page()
+        return self.cursor_page(
+            posts, has_next=True, has_previous=has_previous
+        )
+
+
+def bulk_batch_size(model, limit):
+    """Размер пачки для bulk_create: не больше limit и лимитов базы.
+
+    Django 2.2 не сверяет явный batch_size с базой, а SQLite не принимает
+    в одном INSERT больше 500 строк и 999 параметров.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not isinstance(field, AutoField)
+    ]
+    return min(limit, connection.ops.bulk_batch_size(fields, [None] * limit))
+
+
+def get_paginator_func(request, posts, key=FEED_KEY, count=None):
+    """Страница ленты: по умолчанию и по ?cursor= — keyset, по ?page=N —
+    номерная.
+
+    Номерная страница оставлена только для старых ссылок и перехода на
+    произвольную страницу: ей нужен COUNT(*), поэтому count — заранее
+    известное число постов — избавляет от подсчета. Кнопка «Следующая»
+    с нее ведет уже на курсор.
+    """
     page_number = request.GET.get('page')
+    if page_number is None:
+        return CursorPaginator(
+            posts, settings.POSTS_LIMIT, key
+        ).page_by_cursor(request.GET.get('cursor'))
+    date_field, id_field = key
+    paginator = Paginator(
+        posts.order_by(f'-{date_field}', f'-{id_field}'),
+        settings.POSTS_LIMIT
+    )
+    if count is not None:
+        paginator.count = count
     page_obj = paginator.get_page(page_number)
+    if page_obj.has_next():
+        page_obj.next_cursor = encode_cursor(page_obj[len(page_obj) - 1])
     return page_obj
+
+
+def get_comments_page(comments, cursor=None):
+    """Порция комментариев по возрастанию (pub_date, id) и курсор следующей.
+
+    Первая порция отдается со страницей поста, остальные — по курсору
+    через posts:post_comments («Показать еще»).
+    """
+    comments = comments.order_by('pub_date', 'pk')
+    decoded = decode_cursor(cursor) if cursor else None
+    if decoded is not None:
+        _, pub_date, pk = decoded
+        comments = comments.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        )
+    limit = settings.COMMENTS_LIMIT
+    chunk = list(comments[:limit + 1])
+    if len(chunk) <= limit:
+        return chunk, None
+    return chunk[:limit], encode_cursor(chunk[limit - 1])
@@ -1,11 +1,32 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-
+from django.template.loader import render_to_string
+
+from core.page_cache import cache_anonymous_page
+from core.query_budget import query_budget
+
+from .cache import INDEX_FEED, get_feed_version, group_feed, profile_feed
+from .conditional import (
+    conditional_page, group_validators, index_validators, post_validators,
+    profile_validators
+)
+from .deletion import schedule_post_deletion
+from .feed import get_follow_feed
 from .forms import CommentForm, PostForm
 from .models import Comment, Follow, Group, Post, User
-from .utils import get_paginator_func
+from .search import search_posts
+from .stats import get_user_stats
+from .thumbnails import reset_thumbnail, schedule_thumbnails
+from .utils import get_comments_page, get_paginator_func
 
 
+@query_budget(10)
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -18,6 +39,7 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@query_budget(12)
 @login_required
 def delete_comment(request, comment_id):
     comment = get_object_or_404(Comment, id=comment_id)
@@ -26,16 +48,18 @@ def delete_comment(request, comment_id):
     return redirect('posts:post_detail', post_id=comment.post.id)
 
 
+@query_budget(8)
 @login_required
 def follow_index(request):
-    posts = Post.objects.select_related('group', 'author').all().filter(
-        author__following__user=request.user
+    posts, key = get_follow_feed(request.user)
+    page_obj = get_paginator_func(
+        request, posts.select_related('group', 'author'), key
     )
-    page_obj = get_paginator_func(request, posts)
     context = {'page_obj': page_obj}
     return render(request, 'posts/follow.html', context)
 
 
+@query_budget(20)
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
@@ -47,6 +71,7 @@ def profile_follow(request, username):
     return redirect('posts:profile', username)
 
 
+@query_budget(16)
 @login_required
 def profile_unfollow(request, username):
     get_object_or_404(Follow.objects.filter(
@@ -56,12 +81,22 @@ def profile_unfollow(request, username):
     return redirect('posts:profile', username)
 
 
+@cache_anonymous_page
+@query_budget(6)
+@conditional_page(index_validators)
 def index(request):
     posts = Post.objects.select_related('group', 'author').all()
     page_obj = get_paginator_func(request, posts)
-    return render(request, 'posts/index.html', {'page_obj': page_obj})
+    context = {
+        'page_obj': page_obj,
+        'feed_version': get_feed_version(INDEX_FEED),
+    }
+    return render(request, 'posts/index.html', context)
 
 
+@cache_anonymous_page
+@query_budget(7)
+@conditional_page(group_validators)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('author').all()
@@ -69,10 +104,12 @@ def group_posts(request, slug):
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_version': get_feed_version(group_feed(group.pk)),
     }
     return render(request, 'posts/group_list.html', context, slug)
 
 
+@query_budget(15)
 @login_required
 def post_create(request):
     form = PostForm(
@@ -82,10 +119,14 @@ def post_create(request):
     if not form.is_valid():
         return render(request, 'posts/post_create.html', {'form': form})
     form.instance.author = request.user
-    form.save()
+    with transaction.atomic():
+        post = form.save()
+        if post.image:
+            schedule_thumbnails(post)
     return redirect('posts:profile', request.user.username)
 
 
+@query_budget(13)
 @login_required
 def post_edit(request, post_id):
 
@@ -99,42 +140,98 @@ def post_edit(request, post_id):
     )
     if not form.is_valid():
         return render(request, 'posts/post_create.html', {'form': form})
-    form.save()
+    image_changed = 'image' in form.changed_data
+    if image_changed:
+        reset_thumbnail(post)
+    with transaction.atomic():
+        form.save()
+        if image_changed and post.image:
+            schedule_thumbnails(post)
     return redirect('posts:post_detail', post.id)
 
 
+@query_budget(27)
 def post_delete(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     if request.user == post.author:
-        post.delete()
+        # У поста могут быть тысячи комментариев и записей лент: такой
+        # пост удаляет фоновая задача.
+        schedule_post_deletion(post)
     return redirect('posts:profile', request.user.username)
 
 
+@cache_anonymous_page
+@query_budget(6)
+@conditional_page(post_validators)
 def post_detail(request, post_id):
     post = get_object_or_404(
-        Post.objects.select_related(
-            'author'
-        ).prefetch_related('comments__author'),
+        Post.objects.select_related('author__stats', 'group'),
         id=post_id
     )
+    get_user_stats(post.author)
+    comments, comments_next_cursor = get_comments_page(
+        post.comments.select_related('author'),
+        request.GET.get('comments_cursor')
+    )
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
         'form': form,
-        'comments': post.comments.all(),
+        'comments': comments,
+        'comments_next_cursor': comments_next_cursor,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@query_budget(5)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, id=post_id)
+    comments, next_cursor = get_comments_page(
+        post.comments.select_related('author'), request.GET.get('cursor')
+    )
+    context = {'post': post, 'comments': comments}
+    if request.GET.get('format') != 'json':
+        # Без JSON курсор следующей порции передается в самом фрагменте.
+        context['next_cursor'] = next_cursor
+        return render(request, 'posts/includes/comment_list.html', context)
+    return JsonResponse({
+        'html': render_to_string(
+            'posts/includes/comment_list.html', context, request
+        ),
+        'next_cursor': next_cursor,
+    })
+
+
+@cache_anonymous_page
+@query_budget(4)
+@conditional_page(profile_validators)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    following = (request.user.is_authenticated and request.user != author
-                 and author.following.filter(user=request.user))
+    # Автора со счетчиками уже прочитали валидаторы conditional_page.
+    author = request._profile_author
+    if author is None:
+        raise Http404
+    stats = get_user_stats(author)
     posts = author.posts.select_related('group').all()
-    page_obj = get_paginator_func(request, posts)
+    page_obj = get_paginator_func(request, posts, count=stats.post_count)
     context = {
         'author': author,
-        'following': following,
+        'following': author.is_following,
         'page_obj': page_obj,
+        'feed_version': get_feed_version(profile_feed(author.pk)),
     }
     return render(request, 'posts/profile.html', context)
+
+
+@query_budget(4)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = search_posts(Post.objects.select_related('group', 'author'), query)
+    page_obj = Paginator(posts, settings.POSTS_LIMIT).get_page(
+        request.GET.get('page')
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
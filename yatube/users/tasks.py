@@ -0,0 +1,13 @@
+from django.core.mail import EmailMultiAlternatives
+
+from jobs.queue import job
+
+
+@job
+def send_email(subject, body, from_email, to_email, html_body=None):
+    email_message = EmailMultiAlternatives(
+        subject, body, from_email, [to_email]
+    )
+    if html_body is not None:
+        email_message.attach_alternative(html_body, 'text/html')
+    email_message.send()
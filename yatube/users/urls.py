@@ -6,6 +6,7 @@ from django.contrib.auth.views import (
 from django.urls import path, reverse_lazy
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -40,6 +41,7 @@ urlpatterns = [
         PasswordResetView.as_view(
             template_name='users/password_reset_form.html',
             success_url=reverse_lazy('users:password_reset_done'),
+            form_class=QueuedPasswordResetForm,
         ),
         name='password_reset_form'
     ),
@@ -0,0 +1,9 @@
+"""Настройки выбираются переменной окружения YATUBE_ENV: development (по
+умолчанию) или production.
+"""
+import os
+
+if os.getenv('YATUBE_ENV', 'development') == 'production':
+    from .production import *  # noqa: F401,F403
+else:
+    from .development import *  # noqa: F401,F403
@@ -0,0 +1,235 @@
+"""Общие настройки; окружения дополняют их в development и production."""
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)
+)))
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+
+SECRET_KEY = 's#yl^#2@kg21(n&wllje(ig-5o%5_+(qh7)j^y4)(v2b4=9mr#'
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+DEBUG = False
+
+# Кэш выбирается переменной окружения YATUBE_CACHE_BACKEND. По умолчанию —
+# LocMemCache, свой у каждого процесса. Для нескольких воркеров и для
+# run_jobs, чьи задачи сбрасывают страницы и ленты, нужен общий кэш (это
+# проверяет manage.py check --deploy): 'sqlite' (поставляется с проектом),
+# 'file', либо 'redis' и 'memcached', если установлены django-redis или
+# python-memcached.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'sqlite': (
+        'core.cache_backends.sqlite.SQLiteCache',
+        os.path.join(BASE_DIR, 'cache.sqlite3'),
+    ),
+    'file': (
+        'django.core.cache.backends.filebased.FileBasedCache',
+        os.path.join(BASE_DIR, 'cache'),
+    ),
+    'redis': ('django_redis.cache.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'memcached': (
+        'django.core.cache.backends.memcached.MemcachedCache',
+        '127.0.0.1:11211',
+    ),
+}
+CACHE_NAME = os.getenv('YATUBE_CACHE_BACKEND', 'locmem')
+CACHE_BACKEND, CACHE_LOCATION = CACHE_BACKENDS[CACHE_NAME]
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('YATUBE_CACHE_LOCATION', CACHE_LOCATION),
+        'KEY_PREFIX': os.getenv('YATUBE_CACHE_KEY_PREFIX', 'yatube'),
+        'VERSION': int(os.getenv('YATUBE_CACHE_VERSION', 1)),
+    }
+}
+if CACHE_NAME in ('locmem', 'sqlite', 'file'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('YATUBE_CACHE_MAX_ENTRIES', 10000)),
+    }
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+
+POSTS_LIMIT = 10
+COMMENTS_LIMIT = 20
+
+# Авторы с большим числом подписчиков не раскладываются по лентам при
+# публикации: их посты подмешиваются в /follow/ при чтении.
+FEED_FANOUT_LIMIT = 1000
+# Сколько последних постов автора фоновые задачи дописывают в ленты после
+# подписки и после возвращения автора в лимит раскладки.
+FEED_BACKFILL_LIMIT = 200
+
+# Защита кэша лент от одновременных пересчетов (posts.cache.get_or_compute):
+# сколько секунд отдавать устаревший фрагмент, пока его пересчитывает
+# один процесс, на сколько брать блокировку (и сколько самое большее ждать
+# первого пересчета нового фрагмента) и насколько рано обновлять.
+FEED_CACHE_STALE_GRACE = 60
+FEED_CACHE_LOCK_TIMEOUT = 10
+FEED_CACHE_EARLY_BETA = 1.0
+
+# HTML карточек постов (posts.cards) кэшируется по версии поста.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Миниатюры картинок постов нарезаются после сохранения фоновой задачей
+# (posts.thumbnails). Первая — основная: ее адрес и размеры хранятся в Post.
+POST_THUMBNAILS = (
+    ('960x339', {'upscale': True}),
+)
+
+# Очередь фоновых задач (jobs): воркер запускается `manage.py run_jobs`.
+JOBS_PROCESSES = 2
+JOBS_BATCH_SIZE = 20
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_DELAY = 30
+JOBS_VISIBILITY_TIMEOUT = 300
+
+# Пакетное удаление (posts.deletion): строк в одном DELETE и сколько
+# записей должно быть у пользователя, чтобы его удаляла фоновая задача.
+DELETION_BATCH_SIZE = 500
+DELETION_ASYNC_THRESHOLD = 5000
+
+# JSON API (api): наибольший ?limit= страницы и размер порции выгрузки.
+API_MAX_LIMIT = 100
+API_EXPORT_CHUNK_SIZE = 2000
+
+# Кэш целых страниц для анонимов (core.page_cache): сигналы posts сбрасывают
+# затронутые страницы сразу, таймаут ограничивает остальное.
+PAGE_CACHE_TIMEOUT = 300
+
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'core.apps.CoreConfig',
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'about.apps.AboutConfig',
+    'jobs.apps.JobsConfig',
+    'api.apps.ApiConfig',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.query_budget.QueryBudgetMiddleware',
+    'core.page_cache.AnonymousPageCacheMiddleware',
+    'core.db_router.ReplicaPinningMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+# Бюджеты SQL-запросов представлений (core.query_budget): при отладке и под
+# тестами (их запускает core.test_runner) превышение — ошибка, в работе —
+# предупреждение в журнале.
+QUERY_BUDGET_STRICT = DEBUG
+QUERY_REPEAT_LIMIT = 5
+TEST_RUNNER = 'core.test_runner.DiscoverRunner'
+
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+ROOT_URLCONF = 'yatube.urls'
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+# Компилировать все шаблоны при старте воркера (core.warmup).
+TEMPLATES_WARM_UP = False
+
+
+# SQLite с WAL, PRAGMA и BEGIN IMMEDIATE (core.db_backends.sqlite3);
+# соединение переиспользуется между запросами CONN_MAX_AGE секунд.
+DATABASES = {
+    'default': {
+        'ENGINE': 'core.db_backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+    }
+}
+
+# Реплики только для чтения (core.db_router): пути к копиям базы, которые
+# поддерживает репликация, перечисляются через запятую в YATUBE_DB_REPLICAS.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.getenv('YATUBE_DB_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной базы.
+REPLICA_PIN_SECONDS = 10
+# Допустимое отставание реплик: столько секунд после сброса кэша страницы
+# или сдвига версии ленты ее рендерят с основной базы.
+REPLICA_LAG_SECONDS = 10
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+LANGUAGE_CODE = 'ru-ru'
+
+TIME_ZONE = 'Europe/Moscow'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+STATIC_URL = '/static/'
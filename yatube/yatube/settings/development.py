@@ -0,0 +1,17 @@
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE, TEMPLATES
+
+DEBUG = True
+QUERY_BUDGET_STRICT = DEBUG
+
+INSTALLED_APPS = INSTALLED_APPS + ['debug_toolbar']
+
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
+MIDDLEWARE = MIDDLEWARE + ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
+TEMPLATES[0]['OPTIONS']['context_processors'].insert(
+    0, 'django.template.context_processors.debug'
+)
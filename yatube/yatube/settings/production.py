@@ -0,0 +1,21 @@
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ['YATUBE_SECRET_KEY']
+
+ALLOWED_HOSTS = os.getenv('YATUBE_ALLOWED_HOSTS', 'localhost').split(',')
+
+# Шаблоны читаются и разбираются один раз на процесс, а не на каждый
+# рендеринг; при старте воркера они компилируются заранее.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATES_WARM_UP = True